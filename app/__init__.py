@@ -1,13 +1,25 @@
 import os
+import click
 from flask import Flask
-from flask_migrate import Migrate, upgrade as migrate_upgrade
 from app.auth.routes import auth_bp
 from app.bracket.routes import bracket_bp
-from app.extensions.db import db
+from app.extensions.db import db, get_engine_options
 from app.scoreboard.routes import scoreboard_bp
 from app.rules.routes import rules_bp
 from app.games.routes import games_bp
 from app.admin.routes import admin_bp
+from app.analysis.routes import analysis_bp
+from app.extensions.scoring import rebuild_scores_command
+from app.extensions.encoding import encode_brackets_command
+from app.extensions.validation import audit_brackets_command
+from app.extensions.results import record_results_command
+from app.extensions.poller import poll_results_command, start_poller
+from app.extensions.teams import seed_team_aliases_command, add_team_alias_command
+from app.extensions.seed import setup_db_command
+from app.extensions.passwords import calibrate_hashing_command
+from app.extensions.query_plans import check_query_plans_command
+from app.extensions.constants import NCAA_BASE_URL
+from app.extensions.assets import init_assets, build_assets_command
 
 
 def create_app():
@@ -16,24 +28,26 @@ def create_app():
     app.secret_key = os.environ.get("FLASK_SECRET_KEY")
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["NCAA_BASE_URL"] = os.environ.get("NCAA_BASE_URL", NCAA_BASE_URL)
     
-    # init database
+    # init database, nothing is queried here so every worker boots quickly (run flask setup-db once per deploy)
     db.init_app(app)
-    migrate = Migrate(app, db)
     from app.extensions import models
 
-    with app.app_context():
-        # Run migrations automatically
-        migrate_upgrade()
+    # Only the flask CLI needs migrations and the simulation commands, they pull in alembic and numpy so web workers
+    # skip them
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        from app.extensions.simulation import simulate_pool_command
+        from app.extensions.elimination import paths_to_victory_command
 
-        # Optional: Only seed if table empty
-        from app.extensions.models import Team
-        from app.extensions.seed import seed_teams, seed_round_1, seed_future_rounds
+        Migrate(app, db)
+        app.cli.add_command(simulate_pool_command)
+        app.cli.add_command(paths_to_victory_command)
 
-        if Team.query.count() == 0:
-            teams = seed_teams()
-            seed_round_1(teams)
-            seed_future_rounds()
+    # fingerprinted static files
+    init_assets(app)
 
     # register blueprints
     app.register_blueprint(auth_bp)
@@ -42,6 +56,23 @@ def create_app():
     app.register_blueprint(rules_bp)
     app.register_blueprint(games_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(analysis_bp)
 
+    # register cli commands
+    app.cli.add_command(rebuild_scores_command)
+    app.cli.add_command(encode_brackets_command)
+    app.cli.add_command(audit_brackets_command)
+    app.cli.add_command(record_results_command)
+    app.cli.add_command(poll_results_command)
+    app.cli.add_command(seed_team_aliases_command)
+    app.cli.add_command(add_team_alias_command)
+    app.cli.add_command(calibrate_hashing_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(setup_db_command)
+
+    # Poll for results inside the web process, only use with a single worker (otherwise run flask poll-results)
+    if os.environ.get("NCAA_POLLER") == "thread":
+        start_poller(app)
 
     return app
@@ -1,34 +1,17 @@
 
-from flask import Blueprint, render_template, session, request, redirect, abort
+from flask import Blueprint, render_template, session, request, redirect, abort, jsonify
 from sqlalchemy.orm import aliased
 
-from app.extensions.utils import logged_in, get_team_logo
+from app.extensions.utils import logged_in, get_team_logo, get_cache_stats
 from app.extensions.models import Game, Team
 from app.extensions.db import db
+from app.extensions.results import apply_results
 admin_bp = Blueprint("admin", __name__)
 
 
 def update_game_winner(game_id, winner_id):
     """Update winner for a given game"""
-    game = db.session.get(Game, game_id)
-
-    # 1. Update the winner
-    game.winner_id = winner_id
-
-    # 2. Find child games where this game feeds into
-    child_games = Game.query.filter(
-        (Game.source_game_1 == game_id) | (Game.source_game_2 == game_id)
-    ).all()
-
-    # 3. Update the correct team slot in each child game
-    for child in child_games:
-        if child.source_game_1 == int(game_id):
-            child.team_1_id = winner_id
-
-        if child.source_game_2 == int(game_id):
-            child.team_2_id = winner_id
-
-    db.session.commit()
+    apply_results([(game_id, winner_id)])
 
 
 def get_all_games():
@@ -66,9 +49,49 @@ def admin():
     if request.method == "POST":
         game_id = request.form.get("game_id")
         winner_id = request.form.get("winner_id") or None
-        update_game_winner(game_id, winner_id)
+        try:
+            update_game_winner(game_id, winner_id)
+        except (TypeError, ValueError) as e:
+            return render_template('admin.html', games=get_all_games(), get_team_logo=get_team_logo, msg=str(e)), 400
         return redirect("/admin")
 
     games = get_all_games()
 
     return render_template('admin.html', games=games, get_team_logo=get_team_logo)
+
+
+@admin_bp.route("/admin/cache-stats", methods=["GET"])
+@logged_in
+def cache_stats():
+    """Show how well the rendered page caches are working, to help size them"""
+    if session["user_name"].lower() != "tom":
+        abort(403)
+
+    return jsonify(get_cache_stats())
+
+
+@admin_bp.route("/admin/results", methods=["POST"])
+@logged_in
+def record_results():
+    """
+    Record many results at once from JSON: {"results": [{"game_id": .., "winner_id": ..}], "dry_run": false}.
+
+    Responds with the changed games and the users whose scores are affected.
+    """
+    if session["user_name"].lower() != "tom":
+        abort(403)
+
+    data = request.get_json(silent=True)
+    results = data.get("results", []) if isinstance(data, dict) else None
+
+    if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+        return jsonify({"success": False, "message": "Invalid request!"}), 400
+
+    results = [(result.get("game_id"), result.get("winner_id")) for result in results]
+
+    try:
+        summary = apply_results(results, dry_run=bool(data.get("dry_run")))
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify({"success": True, **summary})
@@ -0,0 +1,38 @@
+from flask import Blueprint, render_template
+from app.extensions.utils import logged_in, get_team_logo, conditional_page
+from app.extensions.versions import RESULTS_VERSION, PICKS_VERSION
+
+analysis_bp = Blueprint("analysis", __name__)
+
+ROUND_NAMES = {
+    1: "Round 1",
+    2: "Round 2",
+    3: "Sweet Sixteen",
+    4: "Elite Eight",
+    5: "Final Four",
+    6: "Championship",
+}
+
+
+@analysis_bp.route("/analysis", methods=["GET"])
+@logged_in
+@conditional_page(lambda: [RESULTS_VERSION, PICKS_VERSION])
+def analysis():
+    """Render the pick analysis page"""
+    # Analytics needs numpy, only loaded once someone opens the page
+    from app.extensions.analytics import get_analytics
+
+    analytics = get_analytics()
+
+    consensus_by_round = {}
+    for pick in analytics["consensus"]:
+        consensus_by_round.setdefault(pick["round"], []).append(pick)
+
+    return render_template(
+        "analysis.html",
+        consensus_by_round=consensus_by_round,
+        uniqueness=analytics["uniqueness"],
+        contrarian_picks=analytics["contrarian_picks"],
+        round_names=ROUND_NAMES,
+        get_team_logo=get_team_logo,
+    )
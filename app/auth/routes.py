@@ -1,9 +1,21 @@
-import hashlib
+import hmac
 import re
 from flask import Blueprint, render_template, request, redirect, session, current_app
-from app.extensions.models import User
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.extensions.models import User, UserScore
 from app.extensions.db import db
-from app.extensions.utils import create_secure_password, logged_in
+from app.extensions.utils import logged_in
+from app.extensions.passwords import (
+    HashingBusy,
+    hash_password,
+    create_password_hash,
+    needs_rehash,
+    is_throttled,
+    record_failed_login,
+    clear_failed_logins,
+)
+from app.extensions.versions import PICKS_VERSION, bump_versions
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -19,6 +31,11 @@ def get_user(name):
     return user
 
 
+def name_taken(name):
+    """Whether a user already has this name, in any case"""
+    return db.session.query(User.user_id).filter(func.lower(User.name) == name.lower()).first() is not None
+
+
 def create_user(name, password_hash, salt, hash_algo, iterations):
     """Create a new user."""
     new_user = User(
@@ -31,6 +48,25 @@ def create_user(name, password_hash, salt, hash_algo, iterations):
     )
 
     db.session.add(new_user)
+    db.session.flush()
+
+    # Start with an empty scoreboard row so the user shows up straight away
+    db.session.add(UserScore(user_id=new_user.user_id))
+    db.session.commit()
+
+    # The new user appears on the scoreboard
+    bump_versions(PICKS_VERSION)
+
+
+def rehash_password(user, password):
+    """Re-hash a user's password with the current policy, keeping the old hash if the pool is busy"""
+    try:
+        user.salt, user.password_hash, user.hash_algo, user.iterations = create_password_hash(
+            password, current_app.secret_key
+        )
+    except HashingBusy:
+        return
+
     db.session.commit()
 
 
@@ -44,21 +80,27 @@ def register():
         password = request.form['password']
 
         # If account already exists or not a valid name, show error message
-        user = get_user(name)
-
-        if user is not None:
+        if name_taken(name):
             msg = f"Account with that name already exists!"
 
         elif not re.match(r'[A-Za-z]+', name):
             msg = 'Name must contain only characters, no numbers or special characters!'
 
         else:
-            # Create hash of password for storage
-            salt, password_hash, hash_algo, iterations = create_secure_password(password, current_app.secret_key)
+            try:
+                # Create hash of password for storage
+                salt, password_hash, hash_algo, iterations = create_password_hash(password, current_app.secret_key)
+            except HashingBusy:
+                return render_template('register.html', msg='Too many people signing in, please try again!'), 503
 
             # User doesn't exist and the form data is valid, so create the new user
-            create_user(name, password_hash, salt, hash_algo, iterations)
-            return render_template('login.html', msg='You have successfully registered!')
+            try:
+                create_user(name, password_hash, salt, hash_algo, iterations)
+                return render_template('login.html', msg='You have successfully registered!')
+            except IntegrityError:
+                # Someone registered the same name at the same time
+                db.session.rollback()
+                msg = f"Account with that name already exists!"
 
     elif request.method == 'POST':
         msg = 'Please input Name and Password!'
@@ -79,20 +121,29 @@ def login():
         # Check if user exists
         user = get_user(name)
 
-        if user is None:
+        if is_throttled(name):
+            # Too many wrong passwords, make them wait before spending more time hashing
+            msg = 'Too many attempts, please wait a few minutes!'
+        elif user is None:
             # Account doesn't exist
             msg = 'Incorrect Name / Password!'
         else:
             # Recompute hash from user entered password
-            password_hash = hashlib.pbkdf2_hmac(
-                user.hash_algo,
-                password.encode('utf-8') + current_app.secret_key.encode('utf-8'),
-                user.salt,
-                user.iterations
-            )
+            try:
+                password_hash = hash_password(
+                    password, current_app.secret_key, user.salt, user.hash_algo, user.iterations
+                )
+            except HashingBusy:
+                return render_template('login.html', msg='Too many people signing in, please try again!'), 503
 
             # Compare hashes
-            if password_hash == user.password_hash:
+            if hmac.compare_digest(password_hash, user.password_hash):
+                clear_failed_logins(name)
+
+                # Hashes made under an older policy are upgraded now that we have the password
+                if needs_rehash(user):
+                    rehash_password(user, password)
+
                 # Create session data, we can access this data in other routes
                 session['loggedin'] = True
                 session['user_id'] = user.user_id
@@ -101,6 +152,7 @@ def login():
                 # Redirect to leaderboard
                 return redirect("/scoreboard")
             else:
+                record_failed_login(name)
                 msg = 'Incorrect Name / Password!'
 
     return render_template("login.html", msg=msg)
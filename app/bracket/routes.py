@@ -1,73 +1,132 @@
 from datetime import datetime, timezone
 
+from sqlalchemy.exc import IntegrityError
 from flask import Blueprint, render_template, request, session, url_for, redirect, jsonify
-from app.extensions.models import (
-    UserPick,
-    User,
-    Team,
-    get_user_picks,
-    get_user_winner_pick,
-    get_user_final_score,
-    get_team_names
-)
-from app.extensions.utils import logged_in, get_team_logo, create_users_bracket_data
+from app.extensions.models import UserPick, User
+from app.extensions.utils import logged_in, conditional_page, render_bracket, invalidate_brackets
 from app.extensions.db import db
 from app.extensions.constants import LOCK_TIME
+from app.extensions.scoring import refresh_user_scores, get_downstream_game_ids
+from app.extensions.encoding import store_user_bracket_bits
+from app.extensions.validation import validate_bracket, get_championship_game_id
+from app.extensions.versions import RESULTS_VERSION, PICKS_VERSION, user_picks_version, bump_versions
 
 bracket_bp = Blueprint("bracket", __name__)
 
 
 @bracket_bp.route("/bracket", methods=["GET"])
 @logged_in
+@conditional_page(lambda: [RESULTS_VERSION, user_picks_version(session["user_id"])])
 def bracket():
     """Create bracket page"""
     user_id = session["user_id"]
-    user_picks = get_user_picks(user_id)
-    winner = get_user_winner_pick(user_id)
-    final_score = get_user_final_score(user_id)
-    team_names = get_team_names()
-    bracket_data = create_users_bracket_data(user_picks, team_names)
     can_edit = datetime.now(timezone.utc) <= LOCK_TIME
 
-    return render_template(
-        "bracket.html",
-        **bracket_data,
-        winner=winner,
-        final_score=final_score,
-        user_picks=user_picks,
-        get_team_logo=get_team_logo,
-        can_edit=can_edit
-    )
+    return render_template("bracket.html", bracket=render_bracket(user_id, can_edit), can_edit=can_edit)
 
 
-def create_user_picks(user_id, user_picks):
-    """Create new picks for a user"""
-    # 1. Delete existing picks
-    UserPick.query.filter_by(user_id=user_id).delete()
+def parse_user_picks(user_picks):
+    """Convert submitted picks into {game_id: team_id}, skipping malformed entries"""
+    return {
+        int(pick["game_id"]): int(pick["team_id"])
+        for pick in user_picks
+        if str(pick.get("game_id")).isdigit() and str(pick.get("team_id")).isdigit()
+    }
+
+
+def save_user_picks(user_id, incoming):
+    """Save a user's picks, {game_id: team_id}, only touching rows that changed. Returns whether anything changed"""
+    existing = {pick.game_id: pick for pick in UserPick.query.filter_by(user_id=user_id).all()}
+    changed = False
+
+    # 1. Update or delete the picks we already have
+    for game_id, pick in existing.items():
+        if game_id not in incoming:
+            db.session.delete(pick)
+            changed = True
+        elif pick.predicted_winner_id != incoming[game_id]:
+            pick.predicted_winner_id = incoming[game_id]
+            changed = True
+
+    # 2. Insert the new ones
+    for game_id, team_id in incoming.items():
+        if game_id not in existing:
+            db.session.add(UserPick(user_id=user_id, game_id=game_id, predicted_winner_id=team_id))
+            changed = True
+
+    db.session.commit()
+
+    return changed
+
 
-    # 2. Insert new picks
-    new_rows = [
-        UserPick(user_id=user_id, game_id=pick["game_id"], predicted_winner_id=pick["team_id"]) for pick in user_picks
-    ]
+def save_single_pick(user_id, game_id, team_id):
+    """
+    Save or clear one pick, clearing any later picks of the team it replaces.
+
+    Returns whether anything changed.
+    """
+    pick = UserPick.query.filter_by(user_id=user_id, game_id=game_id).first()
+    replaced_team_id = pick.predicted_winner_id if pick else None
+
+    if replaced_team_id == team_id:
+        return False
+
+    # 1. Save the new pick
+    if team_id is None:
+        db.session.delete(pick)
+    elif pick is None:
+        db.session.add(UserPick(user_id=user_id, game_id=game_id, predicted_winner_id=team_id))
+    else:
+        pick.predicted_winner_id = team_id
+
+    downstream_game_ids = get_downstream_game_ids(game_id) - {game_id}
+
+    # 2. The replaced team can no longer advance, so clear it from later rounds
+    if replaced_team_id is not None:
+        UserPick.query.filter(
+            UserPick.user_id == user_id,
+            UserPick.game_id.in_(downstream_game_ids),
+            UserPick.predicted_winner_id == replaced_team_id,
+        ).delete(synchronize_session=False)
+
+    # 3. The championship pick is also the user's winner
+    user = db.session.get(User, user_id)
+    if not downstream_game_ids:
+        user.winner_id = team_id
+    elif replaced_team_id is not None and user.winner_id == replaced_team_id:
+        user.winner_id = None
 
-    db.session.bulk_save_objects(new_rows)
     db.session.commit()
 
+    return True
+
+
+def picks_changed(user_id):
+    """Refresh everything derived from a user's picks"""
+    store_user_bracket_bits(user_id)
+    refresh_user_scores([user_id])
+    bump_versions(PICKS_VERSION, user_picks_version(user_id))
+    invalidate_brackets(user_id)
+
 
 def add_user_winner_pick(user_id, winner_id):
-    """Add winner id to user profile"""
+    """Add winner id to user profile. Returns whether it changed"""
     # Find the team by name
     # Update the user
     user = db.session.get(User, user_id)
+    changed = str(user.winner_id) != str(winner_id)
     user.winner_id = winner_id
     db.session.commit()
+    return changed
 
 
 def add_user_final_score(user_id, score):
-    """Add winner id to user profile"""
+    """Add winner id to user profile. Returns whether it changed"""
     user = db.session.get(User, user_id)
+    changed = user.final_score != score
     user.final_score = score
     db.session.commit()
+    return changed
 
 
 @bracket_bp.route("/submit-picks", methods=["POST"])
@@ -75,30 +134,79 @@ def submit_picks():
     """Submit user picks."""
 
     if datetime.now(timezone.utc) >= LOCK_TIME:
-        jsonify({"success": False, "message": "Picks are locked!"})
+        return jsonify({"success": False, "message": "Picks are locked!"})
 
     user_id = session["user_id"]
     data = request.get_json()
     user_picks = data.get("user_picks", [])
-    winner_id = data.get("winner_id")
     final_score = data.get("final_score")
 
-    create_user_picks(user_id, user_picks)
+    # Drop any picks that don't follow from the user's earlier picks
+    user_picks, invalid = validate_bracket(parse_user_picks(user_picks))
+    changed = save_user_picks(user_id, user_picks)
 
-    if winner_id:
-        add_user_winner_pick(user_id, winner_id)
+    # The winner is always the valid championship pick, whatever winner was posted
+    changed |= add_user_winner_pick(user_id, user_picks.get(get_championship_game_id()))
 
     if final_score:
         try:
             final_score = int(final_score)
-            add_user_final_score(user_id, final_score)
+            changed |= add_user_final_score(user_id, final_score)
         except ValueError:
             pass
 
+    if changed:
+        picks_changed(user_id)
+
+    if invalid:
+        return jsonify({"success": True, "message": f"Picks saved! {len(invalid)} inconsistent picks were removed."})
 
     return jsonify({"success": True, "message": "Picks saved!"})
 
 
+@bracket_bp.route("/picks/game/<int:game_id>", methods=["PATCH"])
+def save_pick(game_id):
+    """Save a single pick, so the bracket can autosave as it is filled in."""
+
+    if "loggedin" not in session:
+        return jsonify({"success": False, "message": "Please log in!"}), 401
+
+    if datetime.now(timezone.utc) >= LOCK_TIME:
+        return jsonify({"success": False, "message": "Picks are locked!"}), 403
+
+    user_id = session["user_id"]
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Invalid request!"}), 400
+
+    team_id = data.get("team_id")
+
+    if team_id is not None and not str(team_id).isdigit():
+        return jsonify({"success": False, "message": "Invalid team!"}), 400
+
+    team_id = int(team_id) if team_id is not None else None
+
+    # The team has to have been picked to reach this game
+    if team_id is not None:
+        current_picks = {pick.game_id: pick.predicted_winner_id for pick in UserPick.query.filter_by(user_id=user_id)}
+        _, invalid = validate_bracket({**current_picks, game_id: team_id})
+        if game_id in invalid:
+            return jsonify({"success": False, "message": "That team can't reach this game!"}), 400
+
+    try:
+        changed = save_single_pick(user_id, game_id, team_id)
+    except IntegrityError:
+        # Another request inserted this pick at the same time, save over it
+        db.session.rollback()
+        changed = save_single_pick(user_id, game_id, team_id)
+
+    if changed:
+        picks_changed(user_id)
+
+    return jsonify({"success": True, "message": "Pick saved!"})
+
+
 def reset_user_picks(user_id):
     """Clear all picks for a user"""
     UserPick.query.filter_by(user_id=user_id).delete()
@@ -114,4 +222,5 @@ def reset_picks():
     
     user_id = session["user_id"]
     reset_user_picks(user_id)
+    picks_changed(user_id)
     return redirect(url_for("bracket.bracket"))
@@ -0,0 +1,167 @@
+import numpy as np
+
+from app.extensions.db import db
+from app.extensions.models import User, UserPick
+from app.extensions.topology import get_bracket_topology
+from app.extensions.versions import RESULTS_VERSION, PICKS_VERSION, get_versions
+
+# How many of the most contrarian correct picks to show
+CONTRARIAN_PICK_COUNT = 10
+
+# How many names to list for each of those picks
+MAX_PICKER_NAMES = 10
+
+# (versions, analytics) of the last calculated analytics
+_analytics = None
+
+
+def load_pick_matrix(user_ids, game_ids):
+    """
+    Load every pick with a single query into a users x games matrix of team ids, 0 where a game wasn't picked.
+
+    Rows follow user_ids, which must be sorted, and columns follow game_ids.
+    """
+    picks = db.session.query(UserPick.user_id, UserPick.game_id, UserPick.predicted_winner_id).all()
+
+    columns = {game_id: i for i, game_id in enumerate(game_ids)}
+    picks = [pick for pick in picks if pick.game_id in columns]
+    pick_users = np.array([pick.user_id for pick in picks], dtype=np.int64)
+    pick_games = np.array([columns[pick.game_id] for pick in picks], dtype=np.int64)
+    pick_teams = np.array([pick.predicted_winner_id for pick in picks], dtype=np.int64)
+
+    matrix = np.zeros((len(user_ids), len(game_ids)), dtype=np.int64)
+    matrix[np.searchsorted(user_ids, pick_users), pick_games] = pick_teams
+
+    return matrix
+
+
+def calculate_pick_shares(matrix):
+    """
+    Count how many users picked each team in each game.
+
+    Returns the counts as a games x teams matrix indexed by team id, and each pick's share of its game's picks.
+    """
+    games = np.broadcast_to(np.arange(matrix.shape[1]), matrix.shape)
+    counts = np.zeros((matrix.shape[1], matrix.max(initial=0) + 1), dtype=np.int64)
+    np.add.at(counts, (games, matrix), 1)
+
+    # Column 0 counts the users who left the game blank
+    counts[:, 0] = 0
+    totals = counts.sum(axis=1)
+    shares = counts[games, matrix] / np.maximum(totals, 1)[games]
+
+    return counts, np.where(matrix > 0, shares, np.nan)
+
+
+def build_consensus_bracket(games, counts, columns):
+    """
+    Fill in the bracket with the most popular pick in each game, from the teams the consensus sent there.
+
+    Returns {game_id: team_id}.
+    """
+    consensus = {}
+
+    for game in sorted(games, key=lambda game: game["round"]):
+        if game["round"] == 1:
+            candidates = [game["team_1_id"], game["team_2_id"]]
+        else:
+            candidates = [consensus.get(game["source_game_1"]), consensus.get(game["source_game_2"])]
+
+        candidates = [team_id for team_id in candidates if team_id is not None and team_id < counts.shape[1]]
+        game_counts = counts[columns[game["game_id"]]]
+
+        if candidates and game_counts[candidates].any():
+            consensus[game["game_id"]] = max(candidates, key=lambda team_id: game_counts[team_id])
+
+    return consensus
+
+
+def calculate_analytics():
+    """Calculate pick popularity, the consensus bracket, uniqueness scores and contrarian correct picks"""
+    topology = get_bracket_topology()
+    teams = topology["teams"]
+    games = [game for rounds in topology["regions"].values() for games in rounds.values() for game in games]
+    games_by_id = {game["game_id"]: game for game in games}
+    game_ids = list(games_by_id)
+    columns = {game_id: i for i, game_id in enumerate(game_ids)}
+
+    names = dict(db.session.query(User.user_id, User.name).order_by(User.user_id).all())
+    user_ids = np.array(list(names), dtype=np.int64)
+    matrix = load_pick_matrix(user_ids, game_ids)
+    counts, shares = calculate_pick_shares(matrix)
+
+    # 1. Popularity of every team in every game
+    popularity = {}
+    for game_id in game_ids:
+        game_counts = counts[columns[game_id]]
+        popularity[game_id] = {int(team_id): int(game_counts[team_id]) for team_id in np.flatnonzero(game_counts)}
+
+    # 2. The bracket the pool as a whole would have picked
+    consensus = []
+    for game_id, team_id in build_consensus_bracket(games, counts, columns).items():
+        consensus.append(
+            {
+                "game_id": game_id,
+                "round": games_by_id[game_id]["round"],
+                "region": games_by_id[game_id]["region"],
+                "team_name": teams[team_id]["name"],
+                "team_seed": teams[team_id]["seed"],
+                "share": round(100 * popularity[game_id][team_id] / sum(popularity[game_id].values())),
+            }
+        )
+
+    # 3. How far each user strays from the crowd, the average share of users who didn't make each of their picks
+    picked = matrix > 0
+    uniqueness = np.where(picked.any(axis=1), np.nansum(1 - shares, axis=1) / np.maximum(picked.sum(axis=1), 1), 0)
+    uniqueness_scores = sorted(
+        (
+            {"username": names[user_id].title(), "uniqueness": round(100 * float(score), 1)}
+            for user_id, score in zip(user_ids.tolist(), uniqueness)
+        ),
+        key=lambda row: row["uniqueness"],
+        reverse=True,
+    )
+
+    # 4. Correct picks that the fewest users made
+    contrarian_picks = []
+    for game in games:
+        if game["winner_id"] is None:
+            continue
+
+        column = columns[game["game_id"]]
+        pickers = np.flatnonzero(matrix[:, column] == game["winner_id"])
+        total = int(picked[:, column].sum())
+
+        if len(pickers) and total:
+            picker_names = sorted(names[user_id].title() for user_id in user_ids[pickers].tolist())
+            contrarian_picks.append(
+                {
+                    "round": game["round"],
+                    "team_name": teams[game["winner_id"]]["name"],
+                    "team_seed": teams[game["winner_id"]]["seed"],
+                    "share": round(100 * len(pickers) / total, 1),
+                    "picker_count": len(pickers),
+                    "pickers": picker_names[:MAX_PICKER_NAMES],
+                }
+            )
+
+    contrarian_picks.sort(key=lambda pick: (pick["share"], -pick["round"]))
+
+    return {
+        "popularity": popularity,
+        "consensus": consensus,
+        "uniqueness": uniqueness_scores,
+        "contrarian_picks": contrarian_picks[:CONTRARIAN_PICK_COUNT],
+    }
+
+
+def get_analytics():
+    """Fetch the analytics, only recalculating them when picks or results have changed"""
+    global _analytics
+
+    versions = get_versions([RESULTS_VERSION, PICKS_VERSION])
+
+    if _analytics is None or _analytics[0] != versions:
+        _analytics = (versions, calculate_analytics())
+
+    return _analytics[1]
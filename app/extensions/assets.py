@@ -0,0 +1,352 @@
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+import click
+from flask import abort, current_app, redirect, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+from markupsafe import Markup
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# A year, fingerprinted URLs change whenever the file does so they never need revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+LOGO_FOLDER = "images/team_logos"
+LOGO_EXTENSIONS = [".svg", ".png"]
+
+# Everything flask build-assets writes goes here, inside the static folder
+BUILD_FOLDER = "dist"
+LOGO_SPRITE = f"{BUILD_FOLDER}/team_logos.svg"
+
+# Bundle name -> the static files concatenated into it, in order
+BUNDLES = {
+    "admin.css": ["css/layout.css", "css/admin.css"],
+    "analysis.css": ["css/layout.css", "css/analysis.css"],
+    "bracket.css": ["css/layout.css", "css/bracket.css"],
+    "games.css": ["css/layout.css", "css/games.css"],
+    "rules.css": ["css/layout.css", "css/rules.css"],
+    "scoreboard.css": ["css/layout.css", "css/scoreboard.css"],
+    "login.css": ["css/login_register.css"],
+    "bracket.js": ["js/bracket.js"],
+    "games.js": ["js/games.js"],
+}
+
+# Precompressed variants, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE_EXTENSIONS = [".css", ".js", ".svg"]
+
+# {"files": {path: url}, "logos": {team name: url}, "sprite": {team name: url}, "encodings": {path: {encoding: path}},
+# "signature": ...} for the static folder
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def fingerprint_file(path):
+    """Short hash of a file's contents"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def get_static_signature(static_folder):
+    """Every static file with its size and modified time, to tell when the folder has changed"""
+    signature = []
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            stat = os.stat(os.path.join(root, name))
+            signature.append((os.path.join(root, name), stat.st_size, stat.st_mtime_ns))
+
+    return sorted(signature)
+
+
+def build_manifest(static_folder):
+    """
+    Fingerprint every static file and resolve every team's logo.
+
+    Returns static path -> fingerprinted URL, and team name -> logo URL, preferring SVG over PNG.
+    """
+    files = {}
+    for root, _, names in os.walk(static_folder):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, "/")
+            files[path] = f"/assets/{fingerprint_file(os.path.join(root, name))}/{path}"
+
+    logos = {}
+    for extension in reversed(LOGO_EXTENSIONS):
+        for path, url in files.items():
+            folder, _, name = path.rpartition("/")
+            if folder == LOGO_FOLDER and name.endswith(extension):
+                logos[name[: -len(extension)]] = url
+
+    # Logos in the built sprite are fragments of the one sprite file
+    sprite = {}
+    if LOGO_SPRITE in files:
+        with open(os.path.join(static_folder, LOGO_SPRITE), encoding="utf-8") as f:
+            view_ids = set(re.findall(r'<view id="([^"]+)"', f.read()))
+
+        for team_name in logos:
+            if get_logo_view_id(team_name) in view_ids:
+                sprite[team_name] = f"{files[LOGO_SPRITE]}#{get_logo_view_id(team_name)}"
+
+    encodings = {}
+    for path in files:
+        variants = {encoding: path + suffix for encoding, suffix in ENCODINGS.items() if path + suffix in files}
+        if variants:
+            encodings[path] = variants
+
+    return {
+        "files": files,
+        "logos": logos,
+        "sprite": sprite,
+        "encodings": encodings,
+        "signature": get_static_signature(static_folder),
+    }
+
+
+def load_manifest(app):
+    """Build the manifest for the app's static folder"""
+    global _manifest
+
+    with _manifest_lock:
+        _manifest = build_manifest(app.static_folder)
+
+
+def get_manifest():
+    """Fetch the manifest"""
+    if _manifest is None:
+        load_manifest(current_app)
+
+    return _manifest
+
+
+def reload_changed_manifest():
+    """While debugging, rebuild the manifest before a request if any static file has changed"""
+    if current_app.debug and get_static_signature(current_app.static_folder) != get_manifest()["signature"]:
+        load_manifest(current_app)
+
+
+def asset_url(path):
+    """Fingerprinted URL of a static file, or its plain static URL if it isn't in the manifest"""
+    url = get_manifest()["files"].get(path)
+    if url is None:
+        current_app.logger.warning("%s isn't in the asset manifest, linking it without a fingerprint", path)
+        return url_for("static", filename=path)
+
+    return url
+
+
+def get_logo_url(team_name):
+    """Logo URL of a team from the built sprite, or its own file, or the placeholder if we don't have its logo"""
+    manifest = get_manifest()
+
+    if team_name in manifest["sprite"] and not current_app.debug:
+        return manifest["sprite"][team_name]
+
+    return manifest["logos"].get(team_name, manifest["logos"]["placeholder"])
+
+
+def bundle_tags(name):
+    """
+    Link or script tags for a bundle.
+
+    Uses the built bundle when there is one, otherwise, or while debugging so edits show up straight away, links
+    each of its files.
+    """
+    manifest = get_manifest()
+    built = f"{BUILD_FOLDER}/{name}"
+
+    if built in manifest["files"] and not current_app.debug:
+        urls = [manifest["files"][built]]
+    else:
+        urls = [manifest["files"][path] for path in BUNDLES[name]]
+
+    if name.endswith(".js"):
+        return Markup("\n".join(f'<script src="{url}"></script>' for url in urls))
+
+    return Markup("\n".join(f'<link rel="stylesheet" href="{url}">' for url in urls))
+
+
+def serve_asset(fingerprint, filename):
+    """
+    Serve a fingerprinted static file, cacheable forever as its URL changes with its contents.
+
+    Sends the best precompressed variant the client accepts when the file has been built with any. A URL with an
+    old fingerprint, say from a page cached before a deploy, is redirected to the file's current one.
+    """
+    url = get_manifest()["files"].get(filename)
+    if url is None:
+        abort(404)
+    if url != f"/assets/{fingerprint}/{filename}":
+        return redirect(url)
+
+    variants = get_manifest()["encodings"].get(filename, {})
+    encoding = request.accept_encodings.best_match(list(variants)) if variants else None
+
+    response = send_from_directory(
+        current_app.static_folder,
+        variants[encoding] if encoding else filename,
+        max_age=31536000,
+        mimetype=mimetypes.guess_type(filename)[0],
+    )
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    if variants:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+
+    return response
+
+
+def get_logo_view_id(team_name):
+    """Fragment id of a team's logo in the sprite"""
+    return "logo-" + re.sub(r"[^A-Za-z0-9]+", "-", team_name).strip("-")
+
+
+def prefix_svg_names(svg, prefix):
+    """Prefix the ids and classes inside one logo so they can't clash with another logo's in the sprite"""
+    svg = re.sub(r'\bid="([^"]+)"', rf'id="{prefix}\1"', svg)
+    svg = re.sub(r"url\(#([^)]+)\)", rf"url(#{prefix}\1)", svg)
+    svg = re.sub(r'href="#([^"]+)"', rf'href="#{prefix}\1"', svg)
+    svg = re.sub(r'class="([^"]+)"', lambda m: 'class="' + " ".join(prefix + c for c in m.group(1).split()) + '"', svg)
+    svg = re.sub(
+        r"(<style[^>]*>)(.*?)(</style>)",
+        lambda m: m.group(1) + re.sub(r"\.([A-Za-z_][\w-]*)", rf".{prefix}\1", m.group(2)) + m.group(3),
+        svg,
+        flags=re.S,
+    )
+    return svg
+
+
+def build_logo_sprite(logo_paths):
+    """
+    Stack every SVG logo into one sprite with a <view> per logo.
+
+    Each logo is drawn below the last at its own size, and its view crops the sprite back down to it, so
+    "team_logos.svg#logo-Akron" works anywhere a logo URL does, including <img>.
+    """
+    views = []
+    logos = []
+    y = 0
+
+    for team_name, path in logo_paths.items():
+        with open(path, encoding="utf-8") as f:
+            svg = f.read()
+
+        root = re.search(r"<svg\b([^>]*)>", svg)
+        view_box = re.search(r'viewBox="([^"]+)"', root.group(1))
+        if view_box:
+            width, height = [float(value) for value in re.split(r"[\s,]+", view_box.group(1).strip())[2:]]
+        else:
+            sizes = [re.search(rf'\b{name}="([\d.]+)', root.group(1)) for name in ("width", "height")]
+            width, height = [float(size.group(1)) for size in sizes]
+
+        # Keep the root's presentation attributes (fill, stroke...) but place and size it ourselves
+        attributes = re.sub(r'\s(?:xmlns(?::\w+)?|width|height|x|y|id|version)="[^"]*"', "", root.group(1))
+        content = svg[root.end() : svg.rindex("</svg>")]
+        view_id = get_logo_view_id(team_name)
+
+        views.append(f'<view id="{view_id}" viewBox="0 {y:g} {width:g} {height:g}"/>')
+        logos.append(
+            f'<svg x="0" y="{y:g}" width="{width:g}" height="{height:g}"{attributes}>'
+            f"{prefix_svg_names(content, view_id + '-')}</svg>"
+        )
+        y += height
+
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+        + "\n".join(views + logos)
+        + "\n</svg>\n"
+    )
+
+
+def build_bundle(static_folder, paths, manifest):
+    """Concatenate a bundle's files, pointing relative url()s in CSS at the fingerprinted files they refer to"""
+    parts = []
+
+    for path in paths:
+        with open(os.path.join(static_folder, path), encoding="utf-8") as f:
+            content = f.read()
+
+        def fingerprint_url(match):
+            target = os.path.normpath(os.path.join(os.path.dirname(path), match.group(2))).replace(os.sep, "/")
+            return f"url({match.group(1)}{manifest['files'].get(target, match.group(2))}{match.group(1)})"
+
+        if path.endswith(".css"):
+            content = re.sub(r"""url\((['"]?)(?!data:|https?:|/)([^'")]+)\1\)""", fingerprint_url, content)
+
+        parts.append(f"/* {path} */\n{content}")
+
+    return "\n".join(parts)
+
+
+def compress_file(path):
+    """Write the gzip, and brotli if it's installed, variants of a file next to it"""
+    with open(path, "rb") as f:
+        content = f.read()
+
+    with open(path + ENCODINGS["gzip"], "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(path + ENCODINGS["br"], "wb") as f:
+            f.write(brotli.compress(content))
+
+
+def build_assets(static_folder):
+    """Build the bundles and logo sprite into the build folder, along with their precompressed variants"""
+    build_folder = os.path.join(static_folder, BUILD_FOLDER)
+    os.makedirs(build_folder, exist_ok=True)
+
+    for name in os.listdir(build_folder):
+        os.remove(os.path.join(build_folder, name))
+
+    manifest = build_manifest(static_folder)
+    built = []
+
+    for name, paths in BUNDLES.items():
+        with open(os.path.join(build_folder, name), "w", encoding="utf-8") as f:
+            f.write(build_bundle(static_folder, paths, manifest))
+        built.append(name)
+
+    svg_logos = {
+        team_name: os.path.join(static_folder, url.split("/", 3)[3])
+        for team_name, url in manifest["logos"].items()
+        if url.endswith(".svg")
+    }
+    with open(os.path.join(static_folder, LOGO_SPRITE), "w", encoding="utf-8") as f:
+        f.write(build_logo_sprite(svg_logos))
+    built.append(os.path.basename(LOGO_SPRITE))
+
+    for name in built:
+        if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+            compress_file(os.path.join(build_folder, name))
+
+    return built
+
+
+def init_assets(app):
+    """Build the manifest at startup and register the fingerprinted asset route and template helper"""
+    load_manifest(app)
+    app.add_url_rule("/assets/<fingerprint>/<path:filename>", "asset", serve_asset)
+    app.before_request(reload_changed_manifest)
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.jinja_env.globals["bundle_tags"] = bundle_tags
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Build the page bundles, team logo sprite and their gzip and brotli variants."""
+    built = build_assets(current_app.static_folder)
+    load_manifest(current_app)
+
+    click.echo(f"Built {len(built)} assets into {os.path.join(current_app.static_folder, BUILD_FOLDER)}.")
+    if brotli is None:
+        click.echo("brotli isn't installed, only gzip variants were written.")
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """A thread safe, size bounded, least recently used cache that counts its hits and misses"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Fetch a cached value, marking it as recently used"""
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        """Cache a value, dropping the least recently used one if the cache is full"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Drop every cached value whose key matches the predicate, or everything if no predicate is given"""
+        with self._lock:
+            if predicate is None:
+                self._items.clear()
+                return
+
+            for key in [key for key in self._items if predicate(key)]:
+                del self._items[key]
+
+    def stats(self):
+        """Fetch the size and hit rate of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -12,6 +12,72 @@ ROUND_POINTS = {
     6: 10
 }
 
+# Number of tournaments simulated for the chance to win column, and how many are scored at once
+SIMULATION_COUNT = 10000
+SIMULATION_BATCH_SIZE = 1000
+
+# Every outcome is enumerated for paths to victory once this many games or fewer remain (the sweet sixteen)
+MAX_EXACT_GAMES = 15
+
+# How long a worker trusts its in-memory copy of the data versions, and how many rendered pages it keeps
+VERSION_CACHE_SECONDS = 2
+PAGE_CACHE_SIZE = 512
+
+# How many rendered brackets each worker keeps, one per user, picks version, results version and edit mode
+BRACKET_CACHE_SIZE = 256
+
+# How many picker names the games page loads at a time
+PICKERS_PAGE_SIZE = 50
+
 LOCK_TIME = datetime(2026, 3, 25, 0, 0, 0, tzinfo=timezone.utc)
 
-NCAA_BASE_URL = "https://ncaa-api.henrygd.me"
\ No newline at end of file
+NCAA_BASE_URL = "https://ncaa-api.henrygd.me"
+
+# NCAA API connect and read timeouts, retries with the base backoff between them, and how long responses are reused
+NCAA_CONNECT_TIMEOUT = 3
+NCAA_READ_TIMEOUT = 10
+NCAA_RETRIES = 3
+NCAA_RETRY_BACKOFF = 0.5
+NCAA_CACHE_SECONDS = 15
+
+# How often live scores are pushed to the games page, and how many unsent events a slow client can fall behind by
+LIVE_SCORES_SECONDS = 15
+LIVE_QUEUE_SIZE = 256
+
+# Most live score streams a worker process serves at once. On threaded workers each stream holds a thread, so keep
+# it below gunicorn's --threads to leave some for other requests. Under gevent (stream.py) a stream is a greenlet.
+# Clients turned away try again after LIVE_RETRY_SECONDS
+LIVE_MAX_STREAMS = 150
+LIVE_MAX_STREAMS_GEVENT = 2000
+LIVE_RETRY_SECONDS = 30
+
+# How often the results poller checks the NCAA scoreboard while games are on, and when nothing is being played
+POLL_LIVE_SECONDS = 60
+POLL_IDLE_SECONDS = 900
+
+# How similar an unknown feed name has to be to the name of the known team's opponent to be matched, from 0 to 1
+TEAM_MATCH_CUTOFF = 0.8
+
+# Password hashing policy, stored hashes made with anything else are re-hashed when their user next logs in
+PASSWORD_HASH_ALGO = "sha256"
+PASSWORD_ITERATIONS = 100000
+
+# Threads hashing passwords, and how many more hashes can wait for one before logins are turned away
+HASH_WORKERS = 2
+HASH_QUEUE_LIMIT = 16
+
+# Failed logins allowed per name within the window before that name has to wait
+LOGIN_ATTEMPT_LIMIT = 5
+LOGIN_ATTEMPT_SECONDS = 300
+# Database connection pool defaults, each can be overridden by the environment variable of the same name
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30
+DB_POOL_RECYCLE = 1800
+DB_STATEMENT_TIMEOUT_MS = 30000
+
+# SQLite connection settings, WAL lets readers carry on while picks are being written
+SQLITE_JOURNAL_MODE = "wal"
+SQLITE_SYNCHRONOUS = "normal"
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
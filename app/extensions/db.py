@@ -1,4 +1,71 @@
+import os
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app.extensions.constants import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+)
 
 # single shared SQL instance
 db = SQLAlchemy()
+
+
+def get_env_int(name, default):
+    """Integer setting from the environment, or the default"""
+    return int(os.environ.get(name, default))
+
+
+def get_engine_options(database_url):
+    """
+    Engine options for the database, from the environment with the defaults in constants.
+
+    Pooled connections are checked before use and recycled before the server drops them. In-memory SQLite has a
+    single connection so it isn't pooled.
+    """
+    if not database_url:
+        return {}
+
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    options = {
+        "pool_size": get_env_int("DB_POOL_SIZE", DB_POOL_SIZE),
+        "max_overflow": get_env_int("DB_MAX_OVERFLOW", DB_MAX_OVERFLOW),
+        "pool_timeout": get_env_int("DB_POOL_TIMEOUT", DB_POOL_TIMEOUT),
+        "pool_recycle": get_env_int("DB_POOL_RECYCLE", DB_POOL_RECYCLE),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no"),
+    }
+
+    # SQLite has no statement timeout, its busy timeout is set on connect instead
+    if url.get_backend_name() == "postgresql":
+        statement_timeout = get_env_int("DB_STATEMENT_TIMEOUT_MS", DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+
+    return options
+
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Set up every new SQLite connection, WAL so reads aren't blocked by writes, and a busy timeout for writers"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode = {os.environ.get('SQLITE_JOURNAL_MODE', SQLITE_JOURNAL_MODE)}")
+    cursor.execute(f"PRAGMA synchronous = {os.environ.get('SQLITE_SYNCHRONOUS', SQLITE_SYNCHRONOUS)}")
+    cursor.execute(f"PRAGMA busy_timeout = {get_env_int('SQLITE_BUSY_TIMEOUT_MS', SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size = {get_env_int('SQLITE_MMAP_SIZE', SQLITE_MMAP_SIZE)}")
+    cursor.close()
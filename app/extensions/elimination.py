@@ -0,0 +1,166 @@
+import click
+import numpy as np
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from app.extensions.db import db
+from app.extensions.models import Game, Team, User, UserScore, get_all_user_picks
+from app.extensions.simulation import build_simulation_inputs
+from app.extensions.constants import MAX_EXACT_GAMES
+
+
+def build_downstream_points(inputs):
+    """
+    For every (game, team) column, the points each user would still lose if that team lost the game.
+
+    That is the sum of the user's picks of the same team in every later game the team could have reached.
+    """
+    points = inputs["points"].astype(np.int64)
+    downstream = np.zeros_like(points)
+    columns = inputs["columns"]
+    slot_sources = inputs["slot_sources"]
+
+    child_of = {}
+    for game_index, sources in enumerate(slot_sources):
+        for source in sources:
+            if source >= 0:
+                child_of[source] = game_index
+
+    # Later games come last, so walk backwards to build downstream totals from the final inwards
+    for game_index in reversed(range(len(columns))):
+        child = child_of.get(game_index)
+        if child is None:
+            continue
+
+        for team_id in np.flatnonzero(columns[game_index] >= 0):
+            child_column = columns[child, team_id]
+            downstream[columns[game_index, team_id]] = points[child_column] + downstream[child_column]
+
+    return points, downstream
+
+
+def count_winning_paths(inputs):
+    """
+    Enumerate every outcome of the remaining games and count, for each user, the outcomes where they finish first.
+
+    Outcomes are bitmasks with bit n set when the second team wins the nth remaining game. Each branch keeps
+    only the users who could still catch the leader, and once a single user is left the whole subtree is
+    credited to them without being walked. Returns the path counts, one example winning outcome per user
+    (-1 if eliminated) and the total number of outcomes.
+    """
+    slot_teams = inputs["slot_teams"]
+    slot_sources = inputs["slot_sources"]
+    columns = inputs["columns"]
+    game_count = len(slot_teams)
+    user_count = len(inputs["base_points"])
+
+    points, downstream = build_downstream_points(inputs)
+    paths = np.zeros(user_count, dtype=np.int64)
+    examples = np.full(user_count, -1, dtype=np.int64)
+    winners = np.zeros(game_count, dtype=np.int64)
+
+    def visit(depth, outcome, users, current, remaining, points, downstream):
+        # Drop users who can no longer reach the leader's guaranteed score in this branch
+        contenders = current + remaining >= current.max()
+        if not contenders.all():
+            users, current, remaining = users[contenders], current[contenders], remaining[contenders]
+            points, downstream = points[:, contenders], downstream[:, contenders]
+
+        if len(users) == 1 or depth == game_count:
+            leaders = users[current == current.max()]
+            paths[leaders] += 1 << (game_count - depth)
+            leaders = leaders[examples[leaders] < 0]
+            examples[leaders] = outcome
+            return
+
+        team_1, team_2 = [
+            winners[slot_sources[depth, slot]] if slot_sources[depth, slot] >= 0 else slot_teams[depth, slot]
+            for slot in range(2)
+        ]
+
+        for bit, (winner, loser) in enumerate([(team_1, team_2), (team_2, team_1)]):
+            winners[depth] = winner
+            won = points[columns[depth, winner]]
+            lost = points[columns[depth, loser]] + downstream[columns[depth, loser]]
+
+            visit(depth + 1, outcome | (bit << depth), users, current + won, remaining - won - lost, points, downstream)
+
+    if user_count:
+        current = inputs["base_points"].astype(np.int64)
+        visit(0, 0, np.arange(user_count), current, points.sum(axis=0), points, downstream)
+
+    return paths, examples, 1 << game_count
+
+
+def decode_outcome(inputs, outcome, unresolved_game_ids):
+    """Convert an outcome bitmask back into the winner of each remaining game"""
+    slot_teams = inputs["slot_teams"]
+    slot_sources = inputs["slot_sources"]
+    winners = []
+
+    for depth in range(len(slot_teams)):
+        slot = (outcome >> depth) & 1
+        source = slot_sources[depth, slot]
+        winners.append(int(winners[source] if source >= 0 else slot_teams[depth, slot]))
+
+    return dict(zip(unresolved_game_ids, winners))
+
+
+def calculate_winning_paths():
+    """
+    Count each user's paths to victory, keyed by user id.
+
+    Returns None while too many games remain to enumerate every outcome.
+    """
+    games = Game.query.all()
+    unresolved_game_ids = [g.game_id for g in sorted(games, key=lambda g: (g.round, g.game_id)) if g.winner_id is None]
+
+    if len(unresolved_game_ids) > MAX_EXACT_GAMES:
+        return None
+
+    seeds = {team.team_id: team.seed for team in Team.query.all()}
+    user_ids = [user.user_id for user in User.query.order_by(User.user_id).all()]
+    inputs = build_simulation_inputs(games, seeds, user_ids, get_all_user_picks())
+    paths, examples, total = count_winning_paths(inputs)
+
+    return {
+        user_id: {
+            "paths": int(user_paths),
+            "total_paths": total,
+            "eliminated": bool(user_paths == 0),
+            "example": decode_outcome(inputs, int(example), unresolved_game_ids) if example >= 0 else None,
+        }
+        for user_id, user_paths, example in zip(user_ids, paths, examples)
+    }
+
+
+def update_winning_paths():
+    """Recalculate and store each user's number of paths to victory"""
+    winning_paths = calculate_winning_paths()
+
+    if winning_paths is None:
+        db.session.execute(update(UserScore).values(winning_paths=None))
+    elif winning_paths:
+        db.session.execute(
+            update(UserScore),
+            [{"user_id": user_id, "winning_paths": result["paths"]} for user_id, result in winning_paths.items()],
+        )
+    db.session.commit()
+
+    return winning_paths
+
+
+@click.command("paths-to-victory")
+@with_appcontext
+def paths_to_victory_command():
+    """Count every user's paths to victory once few enough games remain."""
+    winning_paths = update_winning_paths()
+
+    if winning_paths is None:
+        click.echo(f"More than {MAX_EXACT_GAMES} games remain, too many to enumerate.")
+        return
+
+    names = {user.user_id: user.name for user in User.query.all()}
+    for user_id, result in sorted(winning_paths.items(), key=lambda item: -item[1]["paths"]):
+        status = "eliminated" if result["eliminated"] else f"{result['paths']} / {result['total_paths']} paths"
+        click.echo(f"{names[user_id]}: {status}")
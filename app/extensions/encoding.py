@@ -0,0 +1,227 @@
+import click
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.extensions.models import User, UserPick
+from app.extensions.topology import get_bracket_topology
+from app.extensions.constants import ROUND_POINTS
+
+# Games are laid out round by round, with the sources of the game at position p sitting at 2p and 2p + 1 in the
+# previous round. Bit n is set when the winner came from the second source (or is team 2 in the first round).
+ROUND_SIZES = {1: 32, 2: 16, 3: 8, 4: 4, 5: 2, 6: 1}
+ROUND_OFFSETS = {1: 0, 2: 32, 3: 48, 4: 56, 5: 60, 6: 62}
+
+# Seeds fit in 5 bits, each bit gets its own mask so seed points can be counted with popcounts
+SEED_BITS = 5
+
+# (game id -> (round, position), team id -> first round slot), built once as the bracket never changes
+_layout = None
+
+
+def build_bracket_layout(games):
+    """
+    Place every game in the canonical layout, starting from the championship and working back.
+
+    Also numbers the 64 first round slots, the team in slot s plays its round r game at position s >> r and
+    comes from its second source there when bit r - 1 of s is set.
+    """
+    games_by_id = {game["game_id"]: game for game in games}
+    championship = next(game for game in games if game["round"] == max(ROUND_SIZES))
+
+    positions = {}
+    team_slots = {}
+    to_visit = [(championship["game_id"], 0)]
+    while to_visit:
+        game_id, position = to_visit.pop()
+        game = games_by_id[game_id]
+        positions[game_id] = (game["round"], position)
+
+        if game["round"] == 1:
+            team_slots[game["team_1_id"]] = 2 * position
+            team_slots[game["team_2_id"]] = 2 * position + 1
+        else:
+            to_visit.append((game["source_game_1"], 2 * position))
+            to_visit.append((game["source_game_2"], 2 * position + 1))
+
+    return positions, team_slots
+
+
+def get_bracket_layout():
+    """Fetch the canonical layout of the bracket"""
+    global _layout
+
+    if _layout is None:
+        topology = get_bracket_topology()
+        games = [game for rounds in topology["regions"].values() for games in rounds.values() for game in games]
+        _layout = build_bracket_layout(games)
+
+    return _layout
+
+
+def encode_bracket(picks):
+    """
+    Encode picks, {game_id: team_id}, as (bits, mask).
+
+    The mask has a bit for every picked game. Picks of a team that can't reach the game are left out.
+    """
+    positions, team_slots = get_bracket_layout()
+    bits = 0
+    mask = 0
+
+    for game_id, team_id in picks.items():
+        if game_id not in positions or team_id not in team_slots:
+            continue
+
+        round, position = positions[game_id]
+        slot = team_slots[team_id]
+
+        if slot >> round == position:
+            mask |= 1 << (ROUND_OFFSETS[round] + position)
+            bits |= ((slot >> (round - 1)) & 1) << (ROUND_OFFSETS[round] + position)
+
+    return bits, mask
+
+
+def decode_bracket(bits, mask):
+    """
+    Decode (bits, mask) back into picks, {game_id: team_id}.
+
+    Each pick is followed back through the user's earlier picks to its first round slot, so a pick whose
+    earlier picks are missing can't be decoded and is left out.
+    """
+    positions, team_slots = get_bracket_layout()
+    teams_by_slot = {slot: team_id for team_id, slot in team_slots.items()}
+    picks = {}
+
+    for game_id, (round, position) in positions.items():
+        slot = position
+        for source_round in range(round, 0, -1):
+            bit = 1 << (ROUND_OFFSETS[source_round] + slot)
+            if not mask & bit:
+                break
+            slot = 2 * slot + bool(bits & bit)
+        else:
+            picks[game_id] = teams_by_slot[slot]
+
+    return picks
+
+
+def round_bits(value, round):
+    """The bits of one round, shifted down to start at bit 0"""
+    return (value >> ROUND_OFFSETS[round]) & ((1 << ROUND_SIZES[round]) - 1)
+
+
+def even_bits(value):
+    """Gather bits 0, 2, 4, ... of a 32 bit value into bits 0, 1, 2, ..."""
+    value &= 0x55555555
+    value = (value | (value >> 1)) & 0x33333333
+    value = (value | (value >> 2)) & 0x0F0F0F0F
+    value = (value | (value >> 4)) & 0x00FF00FF
+    value = (value | (value >> 8)) & 0x0000FFFF
+    return value
+
+
+def encode_results(results=None):
+    """
+    Encode the actual results, with per round masks of the winners' seed bits for scoring.
+
+    Results, {game_id: winner_id}, default to the winners in the cached bracket.
+    """
+    topology = get_bracket_topology()
+    positions, _ = get_bracket_layout()
+    if results is None:
+        results = {
+            game["game_id"]: game["winner_id"]
+            for rounds in topology["regions"].values()
+            for games in rounds.values()
+            for game in games
+            if game["winner_id"]
+        }
+    bits, mask = encode_bracket(results)
+
+    seed_masks = {round: [0] * SEED_BITS for round in ROUND_SIZES}
+    for game_id, winner_id in results.items():
+        round, position = positions[game_id]
+        for k in range(SEED_BITS):
+            if topology["teams"][winner_id]["seed"] >> k & 1:
+                seed_masks[round][k] |= 1 << position
+
+    return {"bits": bits, "mask": mask, "seed_masks": seed_masks}
+
+
+def score_encoded_bracket(bits, mask, results):
+    """
+    Score an encoded bracket against the encoded results.
+
+    A pick is correct when it agrees with the result on which side the winner came from, and the pick it came
+    from was correct too. Returns current points, correct picks and points per round.
+    """
+    round_scores = {}
+    correct_picks = 0
+    previous_correct = 0
+
+    for round in sorted(ROUND_SIZES):
+        picked = round_bits(mask, round) & round_bits(results["mask"], round)
+        agree = ~(round_bits(bits, round) ^ round_bits(results["bits"], round)) & picked
+
+        if round == 1:
+            correct = agree
+        else:
+            from_second = round_bits(bits, round)
+            from_first_correct = ~from_second & even_bits(previous_correct)
+            from_second_correct = from_second & even_bits(previous_correct >> 1)
+            correct = agree & (from_first_correct | from_second_correct)
+
+        points = ROUND_POINTS[round] * correct.bit_count()
+        for k, seed_mask in enumerate(results["seed_masks"][round]):
+            points += (correct & seed_mask).bit_count() << k
+
+        round_scores[round] = points
+        correct_picks += correct.bit_count()
+        previous_correct = correct
+
+    return sum(round_scores.values()), correct_picks, round_scores
+
+
+def encode_stored_bracket(picks):
+    """
+    Encode picks for storing, or (None, None) when any pick doesn't follow from the user's earlier picks.
+
+    Only consistent brackets are scored bitwise, the others are scored from their picks.
+    """
+    # validation imports this module
+    from app.extensions.validation import validate_bracket
+
+    _, invalid = validate_bracket(picks)
+    if invalid:
+        return None, None
+
+    return encode_bracket(picks)
+
+
+def store_user_bracket_bits(user_id):
+    """Re-encode a user's picks into their stored bracket bits"""
+    picks = {pick.game_id: pick.predicted_winner_id for pick in UserPick.query.filter_by(user_id=user_id).all()}
+    user = db.session.get(User, user_id)
+    user.bracket_bits, user.bracket_mask = encode_stored_bracket(picks)
+    db.session.commit()
+
+
+@click.command("encode-brackets")
+@with_appcontext
+def encode_brackets_command():
+    """Encode every user's picks into their stored bracket bits."""
+    picks_by_user = {}
+    for pick in UserPick.query.all():
+        picks_by_user.setdefault(pick.user_id, {})[pick.game_id] = pick.predicted_winner_id
+
+    users = User.query.all()
+    for user in users:
+        user.bracket_bits, user.bracket_mask = encode_stored_bracket(picks_by_user.get(user.user_id, {}))
+    db.session.commit()
+
+    click.echo(f"Encoded brackets for {len(users)} users.")
+
+    inconsistent = sum(user.bracket_mask is None for user in users)
+    if inconsistent:
+        click.echo(f"{inconsistent} brackets are inconsistent and weren't encoded, run audit-brackets --repair.")
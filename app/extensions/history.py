@@ -0,0 +1,75 @@
+import numpy as np
+from datetime import datetime, timezone
+
+from app.extensions.db import db
+from app.extensions.models import Game, RankSnapshot, UserScore
+
+
+def pack(values):
+    """Pack a list of integers into bytes for storage"""
+    return np.asarray(values, dtype="<i4").tobytes()
+
+
+def unpack(data):
+    """Unpack bytes stored by pack back into an array of integers"""
+    return np.frombuffer(data, dtype="<i4")
+
+
+def take_rank_snapshot():
+    """Store every user's current points and rank as a single snapshot row"""
+    rows = (
+        db.session.query(UserScore.user_id, UserScore.current_points)
+        .order_by(UserScore.current_points.desc(), UserScore.user_id)
+        .all()
+    )
+
+    user_ids = np.array([row.user_id for row in rows], dtype=np.int64)
+    points = np.array([row.current_points for row in rows], dtype=np.int64)
+
+    # Users on the same points share a rank, e.g. 1, 2, 2, 4
+    ranks = np.searchsorted(-points, -points, side="left") + 1
+
+    db.session.add(
+        RankSnapshot(
+            created_at=datetime.now(timezone.utc),
+            games_completed=Game.query.filter(Game.winner_id.isnot(None)).count(),
+            user_ids=pack(user_ids),
+            points=pack(points),
+            ranks=pack(ranks),
+        )
+    )
+    db.session.commit()
+
+
+def get_rank_history():
+    """Fetch each user's rank in every snapshot, oldest first, keyed by user id"""
+    snapshots = RankSnapshot.query.order_by(RankSnapshot.snapshot_id).all()
+
+    history = {}
+    for i, snapshot in enumerate(snapshots):
+        for user_id, rank in zip(unpack(snapshot.user_ids).tolist(), unpack(snapshot.ranks).tolist()):
+            # Users who joined later have no rank in earlier snapshots
+            history.setdefault(user_id, [None] * len(snapshots))[i] = rank
+
+    return history
+
+
+def get_rank_change(ranks):
+    """Places gained (positive) or lost (negative) since the previous snapshot"""
+    if len(ranks) < 2 or ranks[-1] is None or ranks[-2] is None:
+        return 0
+
+    return ranks[-2] - ranks[-1]
+
+
+def rank_chart_points(ranks, user_count, width=80, height=24):
+    """Points of an SVG polyline charting rank over time, first place at the top"""
+    ranks = [rank for rank in ranks if rank is not None]
+
+    if len(ranks) < 2:
+        return ""
+
+    x_step = width / (len(ranks) - 1)
+    y_step = height / max(user_count - 1, 1)
+
+    return " ".join(f"{i * x_step:.1f},{(rank - 1) * y_step:.1f}" for i, rank in enumerate(ranks))
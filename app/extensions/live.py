@@ -0,0 +1,181 @@
+import sys
+import json
+import time
+import queue
+import threading
+
+from flask import current_app
+
+from app.extensions.db import db, get_env_int
+from app.extensions.models import Game, Team
+from app.extensions.ncaa_api import get_current_scores
+from app.extensions.teams import match_feed_game
+from app.extensions.versions import RESULTS_VERSION, get_versions
+from app.extensions.constants import LIVE_SCORES_SECONDS, LIVE_QUEUE_SIZE, LIVE_MAX_STREAMS, LIVE_MAX_STREAMS_GEVENT
+
+
+class Broadcaster:
+    """Fans events out to every connected client, each with its own bounded queue"""
+
+    def __init__(self, queue_size, max_subscribers):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.latest = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """
+        Add a client, returning its queue primed with the latest event for every game.
+
+        Returns None when max_subscribers clients are already connected.
+        """
+        client = queue.Queue(maxsize=self.queue_size)
+
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+
+            for event in self.latest.values():
+                client.put_nowait(event)
+            self._subscribers.add(client)
+
+        return client
+
+    def unsubscribe(self, client):
+        """Remove a client"""
+        with self._lock:
+            self._subscribers.discard(client)
+
+    def publish(self, event, data):
+        """Send an event to every client, dropping it for clients too slow to keep up"""
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+        with self._lock:
+            self.latest[(event, data["game_id"])] = message
+            subscribers = list(self._subscribers)
+
+        for client in subscribers:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                pass
+
+    def subscriber_count(self):
+        """How many clients are connected"""
+        with self._lock:
+            return len(self._subscribers)
+
+
+def streams_hold_threads():
+    """Whether each open stream holds a worker thread, it doesn't under gevent where threads are greenlets"""
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is None or not monkey.is_module_patched("threading")
+
+
+def get_max_streams():
+    """How many streams this process serves at once, a few on threaded workers and thousands under gevent"""
+    default = LIVE_MAX_STREAMS if streams_hold_threads() else LIVE_MAX_STREAMS_GEVENT
+    return get_env_int("LIVE_MAX_STREAMS", default)
+
+
+broadcaster = Broadcaster(LIVE_QUEUE_SIZE, get_max_streams())
+
+# The thread fetching scores for this process's clients, only running while someone is connected
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def format_score_event(game, feed_game, team_ids):
+    """Turn a feed game into a score event for our game, with scores keyed by team id"""
+    return {
+        "game_id": game["game_id"],
+        "scores": {team_ids[0]: feed_game["team_1_score"], team_ids[1]: feed_game["team_2_score"]},
+        "state": feed_game["game_state"],
+        "period": feed_game["game_period"],
+        "clock": feed_game["game_clock"],
+    }
+
+
+def publish_changes(base_url, last_scores, last_winners, last_version):
+    """
+    Fetch the feed and the results once, publishing score events for games that changed and result events for
+    winners set since the last check. Returns the results version that was checked.
+    """
+    # 1. Results, checked through the version so winners set by any worker or the poller are picked up
+    (version,) = get_versions([RESULTS_VERSION])
+    if version != last_version:
+        team_names = dict(db.session.query(Team.team_id, Team.name).all())
+        for game in Game.query.filter(Game.winner_id.isnot(None)).all():
+            if last_winners.get(game.game_id) != game.winner_id:
+                last_winners[game.game_id] = game.winner_id
+                broadcaster.publish(
+                    "result",
+                    {"game_id": game.game_id, "winner_id": game.winner_id, "winner_name": team_names[game.winner_id]},
+                )
+
+    # 2. Scores, from the one shared fetch of the feed
+    for feed_game in get_current_scores(base_url).values():
+        if feed_game["game_state"] == "pre":
+            continue
+
+        game, team_ids = match_feed_game(feed_game)
+        if game is None:
+            continue
+
+        event = format_score_event(game, feed_game, team_ids)
+        if last_scores.get(game["game_id"]) != event:
+            last_scores[game["game_id"]] = event
+            broadcaster.publish("score", event)
+
+    return version
+
+
+def run_fetcher(app):
+    """Publish changes every LIVE_SCORES_SECONDS until the last client disconnects"""
+    global _fetcher
+
+    last_scores = {}
+    last_winners = {}
+    last_version = None
+
+    while True:
+        with _fetcher_lock:
+            if broadcaster.subscriber_count() == 0:
+                _fetcher = None
+                return
+
+        with app.app_context():
+            try:
+                last_version = publish_changes(app.config["NCAA_BASE_URL"], last_scores, last_winners, last_version)
+            except Exception:
+                app.logger.exception("Fetching live scores failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+        time.sleep(LIVE_SCORES_SECONDS)
+
+
+def ensure_fetcher():
+    """Start this process's score fetcher if it isn't running"""
+    global _fetcher
+
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = threading.Thread(
+                target=run_fetcher, args=(current_app._get_current_object(),), name="live-scores", daemon=True
+            )
+            _fetcher.start()
+
+
+def stream_events(client):
+    """Yield a client's events as they arrive, with a comment every so often to keep idle connections open"""
+    try:
+        while True:
+            try:
+                yield client.get(timeout=LIVE_SCORES_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+    finally:
+        broadcaster.unsubscribe(client)
@@ -1,6 +1,5 @@
 from collections import defaultdict
 from app.extensions.db import db
-from sqlalchemy.orm import aliased
 
 
 class User(db.Model):
@@ -14,6 +13,13 @@ class User(db.Model):
     salt = db.Column(db.LargeBinary(16))
     hash_algo = db.Column(db.String(10), nullable=False)
     iterations = db.Column(db.Integer, nullable=False)
+    bracket_bits = db.Column(db.BigInteger)
+    bracket_mask = db.Column(db.BigInteger)
+
+    __table_args__ = (
+        db.Index("uq_users_name", "name", unique=True),
+        db.Index("ix_users_lower_name", db.func.lower(name), unique=True),
+    )
 
 
 class UserPick(db.Model):
@@ -24,6 +30,49 @@ class UserPick(db.Model):
     game_id = db.Column(db.Integer, nullable=False)
     predicted_winner_id = db.Column(db.Integer, nullable=False)
 
+    # The unique constraint also serves every lookup by user, the index serves lookups and counts by game and team
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "game_id", name="uq_user_picks_user_id_game_id"),
+        db.Index("ix_user_picks_game_id_predicted_winner_id", "game_id", "predicted_winner_id", "user_id"),
+    )
+
+
+class UserScore(db.Model):
+    __tablename__ = "user_scores"
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    current_points = db.Column(db.Integer, nullable=False, default=0)
+    max_points = db.Column(db.Integer, nullable=False, default=0)
+    correct_picks = db.Column(db.Integer, nullable=False, default=0)
+    round_1_points = db.Column(db.Integer, nullable=False, default=0)
+    round_2_points = db.Column(db.Integer, nullable=False, default=0)
+    round_3_points = db.Column(db.Integer, nullable=False, default=0)
+    round_4_points = db.Column(db.Integer, nullable=False, default=0)
+    round_5_points = db.Column(db.Integer, nullable=False, default=0)
+    round_6_points = db.Column(db.Integer, nullable=False, default=0)
+    win_probability = db.Column(db.Float)
+    winning_paths = db.Column(db.Integer)
+
+    __table_args__ = (db.Index("ix_user_scores_current_points", "current_points", "user_id"),)
+
+
+class RankSnapshot(db.Model):
+    __tablename__ = "rank_snapshots"
+
+    snapshot_id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    games_completed = db.Column(db.Integer, nullable=False)
+    user_ids = db.Column(db.LargeBinary, nullable=False)
+    points = db.Column(db.LargeBinary, nullable=False)
+    ranks = db.Column(db.LargeBinary, nullable=False)
+
+
+class StateVersion(db.Model):
+    __tablename__ = "state_versions"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 
 class Game(db.Model):
     __tablename__ = "games"
@@ -39,6 +88,12 @@ class Game(db.Model):
     region = db.Column(db.String(50), nullable=False)
     game_time = db.Column(db.Date, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_games_source_game_1", "source_game_1"),
+        db.Index("ix_games_source_game_2", "source_game_2"),
+        db.Index("ix_games_region_round_round_order", "region", "round", "round_order"),
+    )
+
     def to_dict(self):
         return {
             "game_id": self.game_id,
@@ -71,40 +126,12 @@ class Team(db.Model):
         }
 
 
-def get_bracket_data_for_region(region):
-    """Fetch all bracket data"""
-    team_1 = aliased(Team)
-    team_2 = aliased(Team)
-
-    bracket_data = (
-        db.session.query(
-            Game.game_id,
-            Game.round,
-            Game.source_game_1,
-            Game.source_game_2,
-            Game.team_1_id,
-            Game.team_2_id,
-            team_1.name.label("team_1_name"),
-            team_1.seed.label("team_1_seed"),
-            team_2.name.label("team_2_name"),
-            team_2.seed.label("team_2_seed"),
-            Game.winner_id,
-            Game.region,
-            Game.game_time,
-        )
-        .outerjoin(team_1, Game.team_1_id == team_1.team_id)
-        .outerjoin(team_2, Game.team_2_id == team_2.team_id)
-        .filter(Game.region == region)
-        .order_by(Game.round, Game.round_order)
-    ).all()
-
-    # # Group games by round for easier rendering in the template
-    rounds = defaultdict(list)
+class TeamAlias(db.Model):
+    __tablename__ = "team_aliases"
 
-    for game in bracket_data:
-        rounds[game.round].append(dict(game._mapping))
-
-    return rounds
+    # Normalized name, as other sources like the NCAA feed spell it
+    alias = db.Column(db.String(100), primary_key=True)
+    team_id = db.Column(db.Integer, nullable=False)
 
 
 def get_user_picks(user_id: int):
@@ -121,21 +148,23 @@ def get_user_picks(user_id: int):
     return user_picks
 
 
-def get_user_winner_pick(user_id):
-    """get user winner pick"""
-    user = db.session.get(User, user_id)
-    team = db.session.get(Team, user.winner_id)
+def get_all_user_picks(user_ids=None):
+    """Fetch every user's picks in one query, keyed by user id"""
+    query = db.session.query(UserPick.user_id, UserPick.game_id, UserPick.predicted_winner_id, Team.seed).join(
+        Team, UserPick.predicted_winner_id == Team.team_id
+    )
+
+    if user_ids is not None:
+        query = query.filter(UserPick.user_id.in_(user_ids))
 
-    if team is None:
-        return None
+    raw_picks = query.all()
 
-    return {"team_id": team.team_id, "seed": team.seed, "name": team.name}
+    picks_by_user = defaultdict(dict)
 
+    for pick in raw_picks:
+        picks_by_user[pick.user_id][pick.game_id] = (pick.predicted_winner_id, pick.seed)
 
-def get_user_final_score(user_id):
-    """get user final score"""
-    user = db.session.get(User, user_id)
-    return {"value": user.final_score}
+    return picks_by_user
 
 
 def get_team_names():
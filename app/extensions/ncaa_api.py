@@ -1,12 +1,113 @@
-import requests
-import json
-import pandas as pd
-from app.extensions.constants import NCAA_BASE_URL
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone
 
+from app.extensions.constants import (
+    NCAA_BASE_URL,
+    NCAA_CONNECT_TIMEOUT,
+    NCAA_READ_TIMEOUT,
+    NCAA_RETRIES,
+    NCAA_RETRY_BACKOFF,
+    NCAA_CACHE_SECONDS,
+)
 
-def get_current_scores():
-    response = requests.get(NCAA_BASE_URL + "/scoreboard/basketball-men/d1")
-    games = json.loads(response.text)["games"]
+# The feed gives times in Eastern time without an offset, read as a fixed UTC-5 like before
+EST = timezone(timedelta(hours=-5), "EST")
+
+# One keep-alive session per process, shared by every caller
+_session = None
+_session_lock = threading.Lock()
+
+# URL -> {"fetched_at", "etag", "last_modified", "data"} of the last good response
+_responses = {}
+_responses_lock = threading.Lock()
+
+
+def get_session():
+    """Fetch the shared HTTP session, creating it on first use. requests is only imported then, to keep startup fast"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+    return _session
+
+
+def request_with_retries(url, headers):
+    """
+    GET a URL, retrying connection errors, timeouts and server errors with jittered exponential backoff.
+
+    Raises the last error once the retries run out.
+    """
+    import requests
+
+    for attempt in range(NCAA_RETRIES + 1):
+        try:
+            response = get_session().get(url, headers=headers, timeout=(NCAA_CONNECT_TIMEOUT, NCAA_READ_TIMEOUT))
+            if response.status_code < 500:
+                return response
+            response.raise_for_status()
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+            if attempt == NCAA_RETRIES:
+                raise
+
+        time.sleep(NCAA_RETRY_BACKOFF * 2**attempt * random.uniform(0.5, 1.5))
+
+
+def fetch_json(path, base_url=NCAA_BASE_URL):
+    """
+    Fetch JSON from the NCAA API.
+
+    Responses are shared by all callers for NCAA_CACHE_SECONDS. After that the request is conditional on the
+    last ETag / Last-Modified, so an unchanged feed comes back as a 304 and the last body is reused.
+    """
+    url = base_url + path
+
+    with _responses_lock:
+        cached = _responses.get(url)
+
+    if cached is not None and time.monotonic() - cached["fetched_at"] < NCAA_CACHE_SECONDS:
+        return cached["data"]
+
+    headers = {}
+    if cached is not None and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached is not None and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = request_with_retries(url, headers)
+
+    if response.status_code == 304 and cached is not None:
+        data = cached["data"]
+    else:
+        response.raise_for_status()
+        data = response.json()
+
+    with _responses_lock:
+        _responses[url] = {
+            "fetched_at": time.monotonic(),
+            "etag": response.headers.get("ETag", cached and cached["etag"]),
+            "last_modified": response.headers.get("Last-Modified", cached and cached["last_modified"]),
+            "data": data,
+        }
+
+    return data
+
+
+def parse_game_time(start_date, start_time):
+    """Parse the feed's start date and time, e.g. "03-20-2026" and "12:15PM ET", as Eastern time"""
+    return datetime.strptime(f"{start_date} {start_time[:-3]}", "%m-%d-%Y %I:%M%p").replace(tzinfo=EST)
+
+
+def get_current_scores(base_url=NCAA_BASE_URL):
+    games = fetch_json("/scoreboard/basketball-men/d1", base_url)["games"]
 
     game_data = {}
 
@@ -16,9 +117,12 @@ def get_current_scores():
         game_data[game_cfg["gameID"]] = {
             "team_1_name": game_cfg["home"]["names"]["short"],
             "team_1_score": game_cfg["home"]["score"],
+            "team_1_winner": game_cfg["home"].get("winner", False),
             "team_2_name": game_cfg["away"]["names"]["short"],
             "team_2_score": game_cfg["away"]["score"],
-            "game_time": pd.to_datetime(game_cfg["startDate"] + " " + game_cfg["startTime"][:-3]).tz_localize("EST"),
+            "team_2_winner": game_cfg["away"].get("winner", False),
+            "game_time": parse_game_time(game_cfg["startDate"], game_cfg["startTime"]),
+            "game_state": game_cfg["gameState"],
             "game_period": game_cfg["currentPeriod"],
             "game_clock": game_cfg["contestClock"],
         }
@@ -0,0 +1,118 @@
+import os
+import time
+import hashlib
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from app.extensions.constants import (
+    PASSWORD_HASH_ALGO,
+    PASSWORD_ITERATIONS,
+    HASH_WORKERS,
+    HASH_QUEUE_LIMIT,
+    LOGIN_ATTEMPT_LIMIT,
+    LOGIN_ATTEMPT_SECONDS,
+)
+
+# Hashing runs on a small shared pool, PBKDF2 releases the GIL so the threads really run in parallel
+_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+
+# One slot per running or queued hash, once they're gone new attempts are turned away instead of piling up
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)
+
+# Lower case name -> times of recent failed logins
+_failed_logins = defaultdict(deque)
+_failed_logins_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Raised when too many passwords are already waiting to be hashed"""
+
+
+def hash_password(password, secret_key, salt, hash_algo=PASSWORD_HASH_ALGO, iterations=PASSWORD_ITERATIONS):
+    """Hash a password on the hashing pool. Raises HashingBusy if the queue is full"""
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+
+    try:
+        future = _pool.submit(
+            hashlib.pbkdf2_hmac,
+            hash_algo,
+            password.encode("utf-8") + secret_key.encode("utf-8"),
+            salt,
+            iterations,
+        )
+        return future.result()
+    finally:
+        _slots.release()
+
+
+def create_password_hash(password, secret_key):
+    """Hash a new password with the current policy. Returns salt, password hash, hash algorithm and iterations"""
+    salt = os.urandom(16)
+    return salt, hash_password(password, secret_key, salt), PASSWORD_HASH_ALGO, PASSWORD_ITERATIONS
+
+
+def needs_rehash(user):
+    """Whether a user's stored hash was made with an older policy"""
+    return user.hash_algo != PASSWORD_HASH_ALGO or user.iterations != PASSWORD_ITERATIONS
+
+
+def is_throttled(name):
+    """Whether a name has had too many failed logins recently"""
+    cutoff = time.monotonic() - LOGIN_ATTEMPT_SECONDS
+
+    with _failed_logins_lock:
+        attempts = _failed_logins.get(name.lower())
+        if attempts is None:
+            return False
+
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
+
+        if not attempts:
+            del _failed_logins[name.lower()]
+            return False
+
+        return len(attempts) >= LOGIN_ATTEMPT_LIMIT
+
+
+def record_failed_login(name):
+    """Count a failed login against a name"""
+    with _failed_logins_lock:
+        _failed_logins[name.lower()].append(time.monotonic())
+
+
+def clear_failed_logins(name):
+    """Forget a name's failed logins after it logs in"""
+    with _failed_logins_lock:
+        _failed_logins.pop(name.lower(), None)
+
+
+def calibrate_iterations(target_ms, hash_algo=PASSWORD_HASH_ALGO, sample_iterations=20000, repeats=5):
+    """Time PBKDF2 on this machine and scale to the iteration count that takes about target_ms"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac(hash_algo, b"password", os.urandom(16), sample_iterations)
+        timings.append(time.perf_counter() - start)
+
+    seconds_per_iteration = min(timings) / sample_iterations
+    iterations = int(target_ms / 1000 / seconds_per_iteration)
+
+    # Round to a tidy number, never going below the sample size
+    return max(sample_iterations, round(iterations, -4)), seconds_per_iteration
+
+
+@click.command("calibrate-hashing")
+@click.option("--target-ms", default=50, show_default=True, help="How long one password hash should take.")
+def calibrate_hashing_command(target_ms):
+    """Pick the PBKDF2 iteration count that hashes a password in about the target time on this machine."""
+    iterations, seconds_per_iteration = calibrate_iterations(target_ms)
+    current_ms = PASSWORD_ITERATIONS * seconds_per_iteration * 1000
+
+    click.echo(f"{PASSWORD_HASH_ALGO}: {seconds_per_iteration * 1e6:.3f} microseconds per iteration")
+    click.echo(f"Current policy: {PASSWORD_ITERATIONS} iterations, about {current_ms:.0f}ms")
+    click.echo(f"Set PASSWORD_ITERATIONS = {iterations} for about {target_ms}ms, users are re-hashed as they log in")
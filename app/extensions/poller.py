@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.extensions.topology import get_bracket_topology
+from app.extensions.ncaa_api import get_current_scores
+from app.extensions.results import apply_results
+from app.extensions.teams import match_feed_game
+from app.extensions.constants import POLL_LIVE_SECONDS, POLL_IDLE_SECONDS
+
+
+def get_feed_winner_name(feed_game):
+    """Name of the winner of a finished feed game, or None if it isn't finished"""
+    if feed_game["game_state"] != "final":
+        return None
+
+    for slot in (1, 2):
+        if feed_game[f"team_{slot}_winner"]:
+            return feed_game[f"team_{slot}_name"]
+
+    # Older feeds don't flag the winner, fall back to the score
+    score_1, score_2 = int(feed_game["team_1_score"] or 0), int(feed_game["team_2_score"] or 0)
+    if score_1 != score_2:
+        return feed_game["team_1_name"] if score_1 > score_2 else feed_game["team_2_name"]
+
+    return None
+
+
+def match_feed_results(feed_games):
+    """
+    Match finished feed games to our games by their two teams.
+
+    Returns [(game_id, winner_id)] for games whose stored winner is missing or different, so polling the same
+    feed twice records nothing the second time.
+    """
+    results = []
+
+    for feed_game in feed_games.values():
+        winner_name = get_feed_winner_name(feed_game)
+        if winner_name is None:
+            continue
+
+        game, team_ids = match_feed_game(feed_game)
+        winner_id = team_ids[0] if winner_name == feed_game["team_1_name"] else team_ids[1]
+
+        if game is not None and game["winner_id"] != winner_id:
+            results.append((game["game_id"], winner_id))
+
+    return results
+
+
+def next_poll_interval(games, feed_games):
+    """Poll often while games are being played, either today's unfinished games or live ones in the feed"""
+    today = datetime.now(timezone.utc).date()
+
+    games_today = any(
+        game["winner_id"] is None and game["team_1_id"] and game["team_2_id"] and game["game_time"] <= today
+        for game in games
+    )
+    games_live = any(feed_game["game_state"] == "live" for feed_game in feed_games.values())
+
+    return POLL_LIVE_SECONDS if games_today or games_live else POLL_IDLE_SECONDS
+
+
+def poll_results():
+    """
+    Fetch the NCAA scoreboard once and record any new winners.
+
+    Returns how many results were recorded and how long to wait before polling again.
+    """
+    feed_games = get_current_scores(current_app.config["NCAA_BASE_URL"])
+
+    results = match_feed_results(feed_games)
+
+    if results:
+        apply_results(results)
+
+    topology = get_bracket_topology()
+    games = [game for rounds in topology["regions"].values() for games in rounds.values() for game in games]
+    interval = next_poll_interval(games, feed_games)
+
+    return len(results), interval
+
+
+def run_poller(app, stop_event):
+    """Keep polling until stop_event is set, backing off when nothing is being played or the feed is down"""
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                recorded, interval = poll_results()
+                if recorded:
+                    app.logger.info("Recorded %s results from the NCAA feed", recorded)
+            except Exception:
+                app.logger.exception("Polling the NCAA feed failed")
+                db.session.rollback()
+                interval = POLL_IDLE_SECONDS
+            finally:
+                db.session.remove()
+
+        stop_event.wait(interval)
+
+
+def start_poller(app):
+    """Start polling in a daemon thread. Returns the event that stops it"""
+    stop_event = threading.Event()
+    threading.Thread(target=run_poller, args=(app, stop_event), name="ncaa-poller", daemon=True).start()
+    return stop_event
+
+
+@click.command("poll-results")
+@click.option("--once", is_flag=True, help="Poll a single time and exit.")
+@with_appcontext
+def poll_results_command(once):
+    """Poll the NCAA scoreboard and record winners, running until stopped."""
+    if once:
+        recorded, interval = poll_results()
+        click.echo(f"Recorded {recorded} results, next poll in {interval} seconds.")
+        return
+
+    stop_event = threading.Event()
+    try:
+        run_poller(current_app._get_current_object(), stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
@@ -0,0 +1,97 @@
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, or_, text
+
+from app.extensions.db import db
+from app.extensions.models import Game, User, UserPick
+
+
+def get_hot_queries():
+    """The queries run on every page or every result, which should never have to read a whole table"""
+    return {
+        "user picks": db.session.query(UserPick).filter(UserPick.user_id == 1),
+        "user pick for a game": db.session.query(UserPick).filter(UserPick.user_id == 1, UserPick.game_id == 1),
+        "pick counts": db.session.query(
+            UserPick.game_id, UserPick.predicted_winner_id, func.count().label("pick_count")
+        ).group_by(UserPick.game_id, UserPick.predicted_winner_id),
+        "game pickers": db.session.query(User.name)
+        .join(UserPick, UserPick.user_id == User.user_id)
+        .filter(UserPick.game_id == 1, UserPick.predicted_winner_id == 1),
+        "affected users": db.session.query(UserPick.user_id)
+        .filter(UserPick.game_id.in_([1, 2]) & UserPick.predicted_winner_id.in_([1, 2]))
+        .distinct(),
+        "child games": db.session.query(Game).filter(or_(Game.source_game_1 == 1, Game.source_game_2 == 1)),
+        "region games": db.session.query(Game).filter(Game.region == "East").order_by(Game.round, Game.round_order),
+        "user by name": db.session.query(User).filter(User.name == "tom"),
+        "user by lower case name": db.session.query(User).filter(func.lower(User.name) == "tom"),
+    }
+
+
+def explain(query):
+    """Query plan lines for a query, on SQLite or PostgreSQL"""
+    dialect = db.engine.dialect.name
+    sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect == "sqlite":
+        return [row.detail for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+    if dialect == "postgresql":
+        # Tables are small enough that the planner would rather scan them, only allow it when there is no index
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        return [row[0] for row in db.session.execute(text(f"EXPLAIN {sql}"))]
+
+    raise ValueError(f"Query plans can't be checked on {dialect}")
+
+
+def find_full_scans(plan):
+    """Tables a plan reads in full, a scan of a covering index only reads the index so it doesn't count"""
+    tables = []
+
+    for line in plan:
+        sqlite_scan = re.match(r"SCAN (?:TABLE )?(\w+)", line)
+        if sqlite_scan and "COVERING INDEX" not in line:
+            tables.append(sqlite_scan.group(1))
+
+        postgres_scan = re.search(r"Seq Scan on (\w+)", line)
+        if postgres_scan:
+            tables.append(postgres_scan.group(1))
+
+    return tables
+
+
+def check_query_plans():
+    """Explain every hot query. Returns {name: (plan, tables read in full)}"""
+    plans = {}
+
+    try:
+        for name, query in get_hot_queries().items():
+            plan = explain(query)
+            plans[name] = (plan, find_full_scans(plan))
+    finally:
+        db.session.rollback()
+
+    return plans
+
+
+@click.command("check-query-plans")
+@click.option("--verbose", is_flag=True, help="Show every query plan.")
+@with_appcontext
+def check_query_plans_command(verbose):
+    """Explain the hot queries against the database and fail if any of them reads a whole table."""
+    failed = 0
+
+    for name, (plan, full_scans) in check_query_plans().items():
+        if full_scans:
+            failed += 1
+            click.echo(f"FAIL {name}: full scan of {', '.join(full_scans)}")
+        else:
+            click.echo(f"ok   {name}")
+
+        if verbose or full_scans:
+            for line in plan:
+                click.echo(f"       {line}")
+
+    if failed:
+        raise click.ClickException(f"{failed} queries fall back to full table scans.")
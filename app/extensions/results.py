@@ -0,0 +1,170 @@
+import click
+from blinker import Namespace
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.extensions.models import Game, User
+from app.extensions.scoring import get_affected_user_ids, update_scores_for_results
+from app.extensions.versions import RESULTS_VERSION, bump_versions
+from app.extensions.utils import invalidate_brackets
+
+signals = Namespace()
+
+# Sent once after a batch of results is committed, with teams_by_game: {game_id: team ids involved in the result}
+results_changed = signals.signal("results-changed")
+
+
+def apply_results(results, dry_run=False):
+    """
+    Record many results, [(game_id, winner_id)], with one pass through the bracket and a single commit.
+
+    Results are applied round by round, so a winner can be a team that an earlier result in the same batch
+    moved into the game. A winner of None clears the result. Raises ValueError, without saving anything, if a
+    winner isn't playing in its game. Returns the changed games and the names of the users whose scores are
+    affected. With dry_run nothing is saved.
+    """
+    games = {game.game_id: game for game in Game.query.all()}
+    children = {}
+    for game in games.values():
+        for source_game_id in (game.source_game_1, game.source_game_2):
+            if source_game_id is not None:
+                children.setdefault(source_game_id, []).append(game)
+
+    results = {int(game_id): int(winner_id) if winner_id else None for game_id, winner_id in results}
+    unknown = [game_id for game_id in results if game_id not in games]
+    if unknown:
+        raise ValueError(f"Unknown games: {unknown}")
+
+    changed_games = []
+    teams_by_game = {}
+
+    for game_id in sorted(results, key=lambda game_id: (games[game_id].round, game_id)):
+        game = games[game_id]
+        winner_id = results[game_id]
+
+        if winner_id is not None and winner_id not in (game.team_1_id, game.team_2_id):
+            db.session.rollback()
+            raise ValueError(f"Team {winner_id} isn't playing in game {game_id}")
+
+        if game.winner_id == winner_id:
+            continue
+
+        changed_games.append(
+            {"game_id": game_id, "round": game.round, "old_winner_id": game.winner_id, "winner_id": winner_id}
+        )
+        teams_by_game[game_id] = {game.team_1_id, game.team_2_id, game.winner_id}
+
+        # 1. Update the winner
+        game.winner_id = winner_id
+
+        # 2. Move the winner into its slot in the games this game feeds
+        for child in children.get(game_id, []):
+            if child.source_game_1 == game_id:
+                child.team_1_id = winner_id
+
+            if child.source_game_2 == game_id:
+                child.team_2_id = winner_id
+
+    affected_user_ids = get_affected_user_ids(teams_by_game)
+    affected_users = sorted(
+        name.title() for (name,) in db.session.query(User.name).filter(User.user_id.in_(affected_user_ids))
+    )
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+
+        if teams_by_game:
+            send_results_changed(teams_by_game)
+
+    return {"games": changed_games, "affected_users": affected_users}
+
+
+def send_results_changed(teams_by_game):
+    """
+    Run every results_changed receiver in order.
+
+    The results are already committed, so a receiver that fails is logged and the rest still run. The last one
+    lets cached pages know about the results.
+    """
+    app = current_app._get_current_object()
+
+    for receiver in results_changed.receivers_for(app):
+        try:
+            receiver(app, teams_by_game=teams_by_game)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception(f"{receiver.__name__} failed after the results of games {sorted(teams_by_game)}")
+
+
+def refresh_scores(sender, teams_by_game):
+    """Refresh the stored scores of users who picked a team involved in the results"""
+    update_scores_for_results(teams_by_game)
+
+
+def refresh_win_probabilities(sender, teams_by_game):
+    """Re-simulate the rest of the tournament for everyone's chance to win"""
+    from app.extensions.simulation import update_win_probabilities
+
+    update_win_probabilities()
+
+
+def refresh_winning_paths(sender, teams_by_game):
+    """Once few enough games remain, count everyone's exact paths to victory"""
+    from app.extensions.elimination import update_winning_paths
+
+    update_winning_paths()
+
+
+def record_rank_snapshot(sender, teams_by_game):
+    """Record everyone's rank after the results"""
+    from app.extensions.history import take_rank_snapshot
+
+    take_rank_snapshot()
+
+
+def expire_cached_pages(sender, teams_by_game):
+    """Let cached pages know the results have changed"""
+    bump_versions(RESULTS_VERSION)
+    invalidate_brackets()
+
+
+# Receivers run in the order they are connected, and the snapshot needs the refreshed scores. The numpy heavy
+# modules are imported by the receivers themselves so they aren't loaded when workers start
+results_changed.connect(refresh_scores)
+results_changed.connect(refresh_win_probabilities)
+results_changed.connect(refresh_winning_paths)
+results_changed.connect(record_rank_snapshot)
+results_changed.connect(expire_cached_pages)
+
+
+def parse_result(value):
+    """Parse a GAME_ID=WINNER_ID pair from the command line, with a winner of none to clear the result"""
+    game_id, _, winner_id = value.partition("=")
+
+    if not game_id.isdigit() or not (winner_id.isdigit() or winner_id.lower() == "none"):
+        raise click.BadParameter(f"expected GAME_ID=WINNER_ID, got {value}")
+
+    return int(game_id), int(winner_id) if winner_id.isdigit() else None
+
+
+@click.command("record-results")
+@click.argument("results", nargs=-1, required=True)
+@click.option("--dry-run", is_flag=True, help="Show the affected games and users without saving anything.")
+@with_appcontext
+def record_results_command(results, dry_run):
+    """Record many results at once, given as GAME_ID=WINNER_ID pairs."""
+    try:
+        summary = apply_results([parse_result(value) for value in results], dry_run=dry_run)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    for game in summary["games"]:
+        click.echo(f"Game {game['game_id']} (round {game['round']}): {game['old_winner_id']} -> {game['winner_id']}")
+
+    click.echo(f"{len(summary['affected_users'])} users affected: {', '.join(summary['affected_users'])}")
+
+    if dry_run:
+        click.echo("Dry run, nothing was saved.")
@@ -0,0 +1,306 @@
+import click
+from collections import defaultdict
+from flask.cli import with_appcontext
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import aliased
+
+from app.extensions.db import db
+from app.extensions.models import Game, Team, User, UserPick, UserScore, get_all_user_picks
+from app.extensions.constants import ROUND_POINTS
+from app.extensions.encoding import encode_results, score_encoded_bracket
+from app.extensions.versions import RESULTS_VERSION, get_versions
+
+
+def get_all_games():
+    """Fetch all games"""
+    team_1 = aliased(Team)
+    team_2 = aliased(Team)
+
+    games = (
+        db.session.query(
+            Game.game_id,
+            Game.round,
+            Game.source_game_1,
+            Game.source_game_2,
+            Game.team_1_id,
+            team_1.name.label("team_1_name"),
+            Game.team_2_id,
+            team_2.name.label("team_2_name"),
+            Game.winner_id,
+        )
+        .outerjoin(team_1, Game.team_1_id == team_1.team_id)
+        .outerjoin(team_2, Game.team_2_id == team_2.team_id)
+        .order_by(Game.round, Game.game_id)
+        .all()
+    )
+
+    return games
+
+
+# (results version, index) of the last built reachability index
+_reachability_index = None
+
+
+def build_reachability_index(games):
+    """
+    Build the bracket topology as bitsets over the 64 first round slots.
+
+    Returns, for every game, the bitset of slots that can feed it, and for every team the bit of its slot.
+    """
+    feeds = {}
+    team_bits = {}
+
+    first_round = sorted((g for g in games if g.round == 1), key=lambda g: g.game_id)
+    for i, game in enumerate(first_round):
+        team_bits[game.team_1_id] = 1 << (2 * i)
+        team_bits[game.team_2_id] = 1 << (2 * i + 1)
+        feeds[game.game_id] = team_bits[game.team_1_id] | team_bits[game.team_2_id]
+
+    for game in sorted((g for g in games if g.round > 1), key=lambda g: g.round):
+        feeds[game.game_id] = feeds[game.source_game_1] | feeds[game.source_game_2]
+
+    return feeds, team_bits
+
+
+def get_reachability_index(games):
+    """Fetch the bracket reachability index, rebuilt with the cached bracket whenever the results version changes"""
+    global _reachability_index
+
+    (version,) = get_versions([RESULTS_VERSION])
+
+    if _reachability_index is None or _reachability_index[0] != version:
+        _reachability_index = (version, build_reachability_index(games))
+
+    return _reachability_index[1]
+
+
+def build_alive_bitset(games, team_bits):
+    """Build the bitset of first round slots whose team has not been knocked out"""
+    alive = sum(team_bits.values())
+
+    for game in games:
+        # if the game has a real winner, the losing team is eliminated
+        if game.winner_id:
+            loser = game.team_1_id if game.team_2_id == game.winner_id else game.team_2_id
+            alive &= ~team_bits.get(loser, 0)
+
+    return alive
+
+
+def calculate_maximum_remaining_points(user_picks, unresolved_games, feeds, team_bits, alive):
+    """Calculate the maximum points a user can still score from unresolved games"""
+    maximum_points = 0
+
+    for game_id, (predicted_team, predicted_seed) in user_picks.items():
+        game = unresolved_games.get(game_id)
+
+        # A pick still counts if its team is alive and sits in a slot that feeds this game
+        if game is not None and team_bits.get(predicted_team, 0) & feeds[game_id] & alive:
+            maximum_points += ROUND_POINTS[game.round] + predicted_seed
+
+    return maximum_points
+
+
+def calculate_user_score(user_picks, completed_games):
+    """Calculate current points, correct picks and per-round points for one user"""
+    round_scores = defaultdict(int)
+    total_correct = 0
+    current_points = 0
+
+    for game_id, (user_pick, pick_seed) in user_picks.items():
+        actual = completed_games.get(game_id)
+
+        if actual is not None and user_pick == actual.winner_id:
+            points = ROUND_POINTS[actual.round] + pick_seed
+            current_points += points
+            round_scores[actual.round] += points
+            total_correct += 1
+
+    return current_points, total_correct, round_scores
+
+
+def calculate_scores(users, picks_by_user, all_games):
+    """Score every given user in a single pass over the already loaded picks and games"""
+    completed_games = {g.game_id: g for g in all_games if g.winner_id is not None}
+    unresolved_games = {g.game_id: g for g in all_games if g.winner_id is None}
+    feeds, team_bits = get_reachability_index(all_games)
+    alive = build_alive_bitset(all_games, team_bits)
+    results = encode_results({game_id: game.winner_id for game_id, game in completed_games.items()})
+
+    scores = {}
+    for user in users:
+        user_picks = picks_by_user.get(user.user_id, {})
+
+        # Only brackets that passed validation are stored encoded, so they can be scored bitwise
+        if user.bracket_mask is not None:
+            current_points, total_correct, round_scores = score_encoded_bracket(
+                user.bracket_bits, user.bracket_mask, results
+            )
+        else:
+            current_points, total_correct, round_scores = calculate_user_score(user_picks, completed_games)
+        maximum_remaining_points = calculate_maximum_remaining_points(
+            user_picks, unresolved_games, feeds, team_bits, alive
+        )
+
+        scores[user.user_id] = {
+            "current_points": current_points,
+            "max_points": maximum_remaining_points + current_points,
+            "correct_picks": total_correct,
+            "round_scores": round_scores,
+        }
+
+    return scores
+
+
+def to_user_score_row(user_id, score):
+    """Convert a calculated score into a user_scores row"""
+    return {
+        "user_id": user_id,
+        "current_points": score["current_points"],
+        "max_points": score["max_points"],
+        "correct_picks": score["correct_picks"],
+        **{f"round_{r}_points": score["round_scores"].get(r, 0) for r in ROUND_POINTS},
+    }
+
+
+def store_user_scores(scores):
+    """
+    Store calculated scores, {user_id: score}, updating the rows in place.
+
+    Only the score columns are written, so the win probabilities and winning paths stored by the simulation and
+    elimination survive. Users without a row yet get one.
+    """
+    if not scores:
+        return
+
+    existing = {
+        user_id for (user_id,) in db.session.query(UserScore.user_id).filter(UserScore.user_id.in_(list(scores)))
+    }
+    rows = [to_user_score_row(user_id, score) for user_id, score in scores.items()]
+
+    updates = [row for row in rows if row["user_id"] in existing]
+    if updates:
+        db.session.execute(update(UserScore), updates)
+
+    inserts = [row for row in rows if row["user_id"] not in existing]
+    if inserts:
+        db.session.execute(insert(UserScore), inserts)
+
+    db.session.commit()
+
+
+def refresh_user_scores(user_ids):
+    """Recalculate and store the score rows for the given users only"""
+    user_ids = list(user_ids)
+
+    if not user_ids:
+        return
+
+    users = User.query.filter(User.user_id.in_(user_ids)).all()
+    picks_by_user = get_all_user_picks(user_ids)
+    scores = calculate_scores(users, picks_by_user, get_all_games())
+
+    store_user_scores(scores)
+
+
+def rebuild_user_scores():
+    """Recalculate and store the score rows for every user"""
+    users = User.query.all()
+    scores = calculate_scores(users, get_all_user_picks(), get_all_games())
+
+    store_user_scores(scores)
+
+    return len(scores)
+
+
+def get_game_children():
+    """Fetch the games each game feeds into"""
+    children = defaultdict(list)
+    for game in Game.query.filter(Game.source_game_1.isnot(None)).all():
+        children[game.source_game_1].append(game.game_id)
+        children[game.source_game_2].append(game.game_id)
+
+    return children
+
+
+def get_downstream_game_ids(game_id, children=None):
+    """Fetch the given game and every game it feeds into"""
+    if children is None:
+        children = get_game_children()
+
+    game_ids = set()
+    to_visit = [game_id]
+    while to_visit:
+        current = to_visit.pop()
+        if current not in game_ids:
+            game_ids.add(current)
+            to_visit.extend(children[current])
+
+    return game_ids
+
+
+def get_affected_user_ids(teams_by_game):
+    """
+    Fetch the users whose scores can change with the given results, {game_id: team ids involved}.
+
+    A user is affected when they picked one of a result's teams in that game or any game it feeds.
+    """
+    children = get_game_children()
+    conditions = []
+
+    for game_id, team_ids in teams_by_game.items():
+        team_ids = {int(team_id) for team_id in team_ids if team_id}
+        if team_ids:
+            conditions.append(
+                UserPick.game_id.in_(get_downstream_game_ids(int(game_id), children))
+                & UserPick.predicted_winner_id.in_(team_ids)
+            )
+
+    if not conditions:
+        return set()
+
+    return {row.user_id for row in db.session.query(UserPick.user_id).filter(or_(*conditions)).distinct()}
+
+
+def update_scores_for_results(teams_by_game):
+    """Refresh scores of users who picked any of the teams involved in the given results"""
+    refresh_user_scores(get_affected_user_ids(teams_by_game))
+
+
+def get_scoreboard():
+    """Fetch the stored scoreboard in a single query"""
+    rows = (
+        db.session.query(
+            User.name,
+            User.final_score,
+            Team.name.label("champion_name"),
+            UserScore,
+        )
+        .join(User, UserScore.user_id == User.user_id)
+        .outerjoin(Team, User.winner_id == Team.team_id)
+        .order_by(UserScore.current_points.desc(), UserScore.user_id)
+    ).all()
+
+    return [
+        {
+            "user_id": row.UserScore.user_id,
+            "username": row.name.title(),
+            "current_points": row.UserScore.current_points,
+            "max_points": row.UserScore.max_points,
+            "correct_picks": row.UserScore.correct_picks,
+            "round_scores": {r: getattr(row.UserScore, f"round_{r}_points") for r in ROUND_POINTS},
+            "predicted_champion_name": row.champion_name,
+            "predicted_final_score": row.final_score,
+            "win_probability": row.UserScore.win_probability,
+            "winning_paths": row.UserScore.winning_paths,
+        }
+        for row in rows
+    ]
+
+
+@click.command("rebuild-scores")
+@with_appcontext
+def rebuild_scores_command():
+    """Recalculate the stored scoreboard for every user."""
+    count = rebuild_user_scores()
+    click.echo(f"Rebuilt scores for {count} users.")
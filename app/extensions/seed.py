@@ -1,5 +1,9 @@
-from app import db
-from app.extensions.models import Team, Game, UserPick
+import click
+from flask.cli import with_appcontext
+from app.extensions.db import db
+from app.extensions.models import Team, TeamAlias, Game, UserPick
+from app.extensions.teams import normalize_team_name
+from app.extensions.versions import RESULTS_VERSION, PICKS_VERSION, bump_versions
 from datetime import datetime
 
 # Define teams per region — replace with actual names
@@ -81,6 +85,26 @@ WEST_TEAMS = [
 
 REGIONS = [("East", EAST_TEAMS), ("Midwest", MIDWEST_TEAMS), ("South", SOUTH_TEAMS), ("West", WEST_TEAMS)]
 
+# How the NCAA feed names teams whose names above don't normalize to the same thing
+TEAM_ALIASES = {
+    "N. Iowa": ["Northern Iowa", "UNI"],
+    "N. Dakota": ["North Dakota"],
+    "N. Carolina": ["North Carolina", "UNC"],
+    "Cal Baptist": ["California Baptist"],
+    "Tenn. State": ["Tennessee St."],
+    "MIAOH/SMU": ["Miami (OH)"],
+    "UBMC/HOW": ["UMBC", "Howard"],
+    "PVAM/LEH": ["Prairie View", "Prairie View A&M", "Lehigh"],
+    "Texas/NCST": ["NC State", "North Carolina St."],
+    "Miami": ["Miami (FL)"],
+    "Kennesaw": ["Kennesaw St."],
+    "McNeese": ["McNeese St."],
+    "Queens": ["Queens (NC)"],
+    "Hawaii": ["Hawai'i"],
+    "Saint Mary's": ["Saint Mary's (CA)"],
+    "LIU": ["Long Island"],
+}
+
 GAME_TIME = datetime(2025, 1, 1, 12, 0)
 
 def clear_existing_tables():
@@ -197,3 +221,44 @@ def seed_future_rounds():
                 db.session.add(new_game)
         db.session.commit()
         print(f"Round {round_number} games seeded.")
+
+
+def seed_team_aliases():
+    """Store the known NCAA feed names for our teams, skipping any already stored"""
+    team_ids = {team.name: team.team_id for team in Team.query.all()}
+    existing = {alias.alias for alias in TeamAlias.query.all()}
+    added = 0
+
+    for name, aliases in TEAM_ALIASES.items():
+        for alias in {normalize_team_name(alias) for alias in aliases} - existing:
+            db.session.add(TeamAlias(alias=alias, team_id=team_ids[name]))
+            added += 1
+
+    db.session.commit()
+    print(f"{added} team aliases seeded.")
+    return added
+
+
+@click.command("setup-db")
+@with_appcontext
+def setup_db_command():
+    """Run the migrations and seed the bracket into an empty database. Run once per deploy, before the workers."""
+    from flask import current_app
+    from flask_migrate import Migrate, upgrade as migrate_upgrade
+
+    # Apps built outside the flask CLI, like the benchmarks, don't have migrations set up yet
+    if "migrate" not in current_app.extensions:
+        Migrate(current_app, db)
+
+    migrate_upgrade()
+
+    if Team.query.count() == 0:
+        teams = seed_teams()
+        seed_round_1(teams)
+        seed_future_rounds()
+        seed_team_aliases()
+
+        # Workers that started before the bracket was seeded reload everything they cached from the empty tables
+        bump_versions(RESULTS_VERSION, PICKS_VERSION)
+    else:
+        click.echo("Bracket already seeded.")
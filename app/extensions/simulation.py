@@ -0,0 +1,184 @@
+import click
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from app.extensions.db import db
+from app.extensions.models import Game, Team, User, UserScore, get_all_user_picks
+from app.extensions.constants import ROUND_POINTS, SIMULATION_COUNT, SIMULATION_BATCH_SIZE
+
+
+def seed_prior(seed_1, seed_2):
+    """Probability that team 1 beats team 2, the better seed is favoured in proportion to the seeds"""
+    return seed_2 / (seed_1 + seed_2)
+
+
+def even_prior(seed_1, seed_2):
+    """Probability that team 1 beats team 2, every game is a coin flip"""
+    return np.full(np.shape(seed_1), 0.5)
+
+
+PRIORS = {"seed": seed_prior, "even": even_prior}
+
+
+def build_simulation_inputs(games, seeds, user_ids, picks_by_user):
+    """
+    Build the arrays needed to simulate the unresolved games.
+
+    Every unresolved game gets a list of the teams that could still win it. Each (game, team) pair is a column
+    of the points matrix, so scoring a batch of simulated brackets is a single matrix product.
+    """
+    games_by_id = {game.game_id: game for game in games}
+    unresolved = [game for game in sorted(games, key=lambda g: (g.round, g.game_id)) if game.winner_id is None]
+    game_index = {game.game_id: i for i, game in enumerate(unresolved)}
+
+    # For each slot of each unresolved game, either a fixed team id or the index of the game that feeds it
+    slot_teams = np.zeros((len(unresolved), 2), dtype=np.int64)
+    slot_sources = np.full((len(unresolved), 2), -1, dtype=np.int64)
+    candidates = []
+
+    for i, game in enumerate(unresolved):
+        game_candidates = set()
+        for slot, (team_id, source_id) in enumerate(
+            [(game.team_1_id, game.source_game_1), (game.team_2_id, game.source_game_2)]
+        ):
+            if team_id:
+                slot_teams[i, slot] = team_id
+                game_candidates.add(team_id)
+            elif source_id in game_index:
+                slot_sources[i, slot] = game_index[source_id]
+                game_candidates |= candidates[game_index[source_id]]
+            elif source_id in games_by_id:
+                # Resolved source whose winner has not been copied into this game yet
+                slot_teams[i, slot] = games_by_id[source_id].winner_id
+                game_candidates.add(games_by_id[source_id].winner_id)
+        candidates.append(game_candidates)
+
+    max_team_id = max(seeds) if seeds else 0
+    seed_lookup = np.ones(max_team_id + 1, dtype=np.float64)
+    for team_id, seed in seeds.items():
+        seed_lookup[team_id] = seed
+
+    # Map (game, team) to a column of the points matrix
+    columns = np.full((len(unresolved), max_team_id + 1), -1, dtype=np.int64)
+    column_count = 0
+    for i, game_candidates in enumerate(candidates):
+        for team_id in sorted(game_candidates):
+            columns[i, team_id] = column_count
+            column_count += 1
+
+    points = np.zeros((column_count, len(user_ids)), dtype=np.float32)
+    base_points = np.zeros(len(user_ids), dtype=np.float32)
+
+    for u, user_id in enumerate(user_ids):
+        for game_id, (team_id, seed) in picks_by_user.get(user_id, {}).items():
+            game = games_by_id.get(game_id)
+            if game is None:
+                continue
+
+            pick_points = ROUND_POINTS[game.round] + seed
+
+            if game.winner_id is not None:
+                if team_id == game.winner_id:
+                    base_points[u] += pick_points
+
+            elif team_id <= max_team_id and columns[game_index[game_id], team_id] >= 0:
+                points[columns[game_index[game_id], team_id], u] = pick_points
+
+    return {
+        "slot_teams": slot_teams,
+        "slot_sources": slot_sources,
+        "seed_lookup": seed_lookup,
+        "columns": columns,
+        "points": points,
+        "base_points": base_points,
+    }
+
+
+def simulate_batch(inputs, simulations, seed_sequence, prior="seed"):
+    """Simulate a batch of tournaments and return the share of wins for each user"""
+    rng = np.random.default_rng(seed_sequence)
+    slot_teams = inputs["slot_teams"]
+    slot_sources = inputs["slot_sources"]
+    columns = inputs["columns"]
+    game_count = len(slot_teams)
+
+    winners = np.zeros((simulations, game_count), dtype=np.int64)
+    one_hot = np.zeros((simulations, len(inputs["points"])), dtype=np.float32)
+    rows = np.arange(simulations)
+
+    # Games are ordered by round, so source games are always simulated first
+    for i in range(game_count):
+        team_1 = winners[:, slot_sources[i, 0]] if slot_sources[i, 0] >= 0 else np.full(simulations, slot_teams[i, 0])
+        team_2 = winners[:, slot_sources[i, 1]] if slot_sources[i, 1] >= 0 else np.full(simulations, slot_teams[i, 1])
+
+        win_chance = PRIORS[prior](inputs["seed_lookup"][team_1], inputs["seed_lookup"][team_2])
+        winners[:, i] = np.where(rng.random(simulations) < win_chance, team_1, team_2)
+        one_hot[rows, columns[i, winners[:, i]]] = 1
+
+    scores = inputs["base_points"] + one_hot @ inputs["points"]
+
+    # Users tied for first share the win
+    leaders = scores == scores.max(axis=1, keepdims=True)
+    return (leaders / leaders.sum(axis=1, keepdims=True)).sum(axis=0)
+
+
+def run_simulations(inputs, simulations, seed=None, prior="seed", workers=1, batch_size=SIMULATION_BATCH_SIZE):
+    """Run the simulations in batches, optionally sharded across processes"""
+    batch_sizes = [batch_size] * (simulations // batch_size)
+    if simulations % batch_size:
+        batch_sizes.append(simulations % batch_size)
+
+    # One child seed per batch, so results don't depend on the number of workers
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    batches = [(inputs, size, seq, prior) for size, seq in zip(batch_sizes, seed_sequences)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_batch, *zip(*batches)))
+    else:
+        results = [simulate_batch(*batch) for batch in batches]
+
+    return np.sum(results, axis=0) / simulations
+
+
+def calculate_win_probabilities(simulations=SIMULATION_COUNT, seed=None, prior="seed", workers=1):
+    """Calculate each user's chance of winning the pool, keyed by user id"""
+    games = Game.query.all()
+    seeds = {team.team_id: team.seed for team in Team.query.all()}
+    user_ids = [user.user_id for user in User.query.order_by(User.user_id).all()]
+
+    if not user_ids:
+        return {}
+
+    inputs = build_simulation_inputs(games, seeds, user_ids, get_all_user_picks())
+    probabilities = run_simulations(inputs, simulations, seed=seed, prior=prior, workers=workers)
+
+    return {user_id: float(p) for user_id, p in zip(user_ids, probabilities)}
+
+
+def update_win_probabilities(**kwargs):
+    """Recalculate and store each user's chance of winning the pool"""
+    probabilities = calculate_win_probabilities(**kwargs)
+
+    if probabilities:
+        db.session.execute(
+            update(UserScore),
+            [{"user_id": user_id, "win_probability": p} for user_id, p in probabilities.items()],
+        )
+        db.session.commit()
+
+    return probabilities
+
+
+@click.command("simulate-pool")
+@click.option("--simulations", default=SIMULATION_COUNT, help="Number of tournaments to simulate.")
+@click.option("--seed", default=None, type=int, help="Random seed, for repeatable results.")
+@click.option("--prior", default="seed", type=click.Choice(list(PRIORS)), help="How likely each team is to win.")
+@click.option("--workers", default=1, help="Number of processes to spread the simulations across.")
+@with_appcontext
+def simulate_pool_command(simulations, seed, prior, workers):
+    """Simulate the remaining games and store each user's chance of winning."""
+    probabilities = update_win_probabilities(simulations=simulations, seed=seed, prior=prior, workers=workers)
+    click.echo(f"Simulated {simulations} tournaments for {len(probabilities)} users.")
@@ -0,0 +1,175 @@
+import re
+import difflib
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.extensions.models import Team, TeamAlias
+from app.extensions.topology import get_bracket_topology
+from app.extensions.constants import TEAM_MATCH_CUTOFF
+
+# Normalized name -> team id, from team names, the halves of play-in "A/B" names and stored aliases
+_team_index = None
+
+# (feed name, team id) pairs already logged as fuzzy matches, so each is only logged once per process
+_logged_matches = set()
+
+# (topology, {frozenset of both team ids: game}) for the games whose teams are known
+_games_by_teams = None
+
+
+def normalize_team_name(name):
+    """Reduce a team name to lower case letters and digits, so "Ohio. St." and "Ohio St" match"""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def build_team_index(teams, aliases):
+    """
+    Build the normalized name index.
+
+    A play-in slot like "MIAOH/SMU" is indexed under the whole name and each half, so whichever team wins the
+    play-in is found. Stored aliases win over names.
+    """
+    index = {}
+
+    for team in teams:
+        index[normalize_team_name(team.name)] = team.team_id
+
+        for part in team.name.split("/"):
+            index.setdefault(normalize_team_name(part), team.team_id)
+
+    for alias in aliases:
+        index[alias.alias] = alias.team_id
+
+    return index
+
+
+def get_team_index():
+    """Fetch the team name index, teams never change so it is only built once"""
+    global _team_index
+
+    if _team_index is None:
+        _team_index = build_team_index(Team.query.all(), TeamAlias.query.all())
+
+    return _team_index
+
+
+def add_team_alias(name, team_id):
+    """Store an alias for a team and add it to the index"""
+    alias = normalize_team_name(name)
+    db.session.merge(TeamAlias(alias=alias, team_id=team_id))
+    db.session.commit()
+
+    get_team_index()[alias] = team_id
+
+
+def resolve_team_id(name):
+    """Find the team id for a name from another source, by its name or a stored alias. Returns None if unknown"""
+    return get_team_index().get(normalize_team_name(name))
+
+
+def get_game_by_teams(team_ids):
+    """Find the game between two teams, rebuilt from the cached bracket whenever the results change"""
+    global _games_by_teams
+
+    topology = get_bracket_topology()
+
+    if _games_by_teams is None or _games_by_teams[0] is not topology:
+        games = [game for rounds in topology["regions"].values() for games in rounds.values() for game in games]
+        _games_by_teams = (
+            topology,
+            {
+                frozenset((game["team_1_id"], game["team_2_id"])): game
+                for game in games
+                if game["team_1_id"] and game["team_2_id"]
+            },
+        )
+
+    return _games_by_teams[1].get(frozenset(team_ids))
+
+
+def match_opponent(name, team_id, day):
+    """
+    Find the game a known team plays on a day against a team with a name close to name.
+
+    Only the team's own opponents in the bracket that day are candidates, so a similar name from outside the
+    tournament (Kansas St. for Kansas) can't be matched. Matches aren't stored, they are logged for an admin to
+    confirm with add-team-alias. Returns (game, opponent team id), or (None, None)
+    """
+    topology = get_bracket_topology()
+    candidates = {}
+
+    for rounds in topology["regions"].values():
+        for games in rounds.values():
+            for game in games:
+                if game["game_time"] != day or team_id not in (game["team_1_id"], game["team_2_id"]):
+                    continue
+
+                slot = 2 if game["team_1_id"] == team_id else 1
+                if game[f"team_{slot}_id"]:
+                    for part in game[f"team_{slot}_name"].split("/"):
+                        candidates[normalize_team_name(part)] = (game, game[f"team_{slot}_id"])
+
+    matches = difflib.get_close_matches(normalize_team_name(name), candidates, n=1, cutoff=TEAM_MATCH_CUTOFF)
+    if not matches:
+        return None, None
+
+    game, opponent_id = candidates[matches[0]]
+
+    if (name, opponent_id) not in _logged_matches:
+        _logged_matches.add((name, opponent_id))
+        current_app.logger.warning(
+            "Matched feed team %r to %s in game %s, confirm with: flask add-team-alias %r %s",
+            name,
+            topology["teams"][opponent_id]["name"],
+            game["game_id"],
+            name,
+            opponent_id,
+        )
+
+    return game, opponent_id
+
+
+def match_feed_game(feed_game):
+    """
+    Find our game for a feed game, along with the team ids of the feed's team 1 and team 2.
+
+    Both teams are looked up by name. When only one is known, the other is fuzzy matched against that team's
+    opponent on the day of the feed game.
+    """
+    team_ids = [resolve_team_id(feed_game[f"team_{slot}_name"]) for slot in (1, 2)]
+
+    if team_ids.count(None) == 1:
+        unknown = team_ids.index(None)
+        game, team_ids[unknown] = match_opponent(
+            feed_game[f"team_{unknown + 1}_name"], team_ids[1 - unknown], feed_game["game_time"].date()
+        )
+        return game, team_ids
+
+    return get_game_by_teams(team_ids), team_ids
+
+
+@click.command("add-team-alias")
+@click.argument("name")
+@click.argument("team_id", type=int)
+@with_appcontext
+def add_team_alias_command(name, team_id):
+    """Store NAME, as the NCAA feed spells it, as an alias of our team TEAM_ID."""
+    team = db.session.get(Team, team_id)
+    if team is None:
+        raise click.ClickException(f"No team {team_id}")
+
+    add_team_alias(name, team_id)
+    click.echo(f"{name} is now an alias of {team.name}.")
+
+
+@click.command("seed-team-aliases")
+@with_appcontext
+def seed_team_aliases_command():
+    """Store the known NCAA feed names for our teams."""
+    from app.extensions.seed import seed_team_aliases
+
+    added = seed_team_aliases()
+    click.echo(f"Added {added} team aliases.")
@@ -0,0 +1,89 @@
+from types import MappingProxyType
+from sqlalchemy.orm import aliased
+
+from app.extensions.db import db
+from app.extensions.models import Game, Team
+from app.extensions.constants import REGIONS
+from app.extensions.versions import RESULTS_VERSION, get_versions
+
+# (results version, topology) of the last loaded bracket
+_topology = None
+
+
+def load_bracket_topology():
+    """
+    Load the whole bracket with a single query.
+
+    Returns read-only games grouped by region and round, plus every team's name and seed. Callers must copy
+    games before changing them.
+    """
+    team_1 = aliased(Team)
+    team_2 = aliased(Team)
+
+    bracket_data = (
+        db.session.query(
+            Game.game_id,
+            Game.round,
+            Game.source_game_1,
+            Game.source_game_2,
+            Game.team_1_id,
+            Game.team_2_id,
+            team_1.name.label("team_1_name"),
+            team_1.seed.label("team_1_seed"),
+            team_2.name.label("team_2_name"),
+            team_2.seed.label("team_2_seed"),
+            Game.winner_id,
+            Game.region,
+            Game.game_time,
+        )
+        .outerjoin(team_1, Game.team_1_id == team_1.team_id)
+        .outerjoin(team_2, Game.team_2_id == team_2.team_id)
+        .order_by(Game.round, Game.round_order)
+    ).all()
+
+    regions = {region: {} for region in REGIONS}
+    teams = {}
+
+    for game in bracket_data:
+        regions[game.region].setdefault(game.round, []).append(MappingProxyType(dict(game._mapping)))
+
+        # Every team plays in the first round, so this sees them all
+        if game.round == 1:
+            for slot in (1, 2):
+                team_id = game._mapping[f"team_{slot}_id"]
+                teams[team_id] = MappingProxyType(
+                    {
+                        "team_id": team_id,
+                        "name": game._mapping[f"team_{slot}_name"],
+                        "seed": game._mapping[f"team_{slot}_seed"],
+                    }
+                )
+
+    return MappingProxyType(
+        {
+            "regions": MappingProxyType(
+                {
+                    region: MappingProxyType({round: tuple(games) for round, games in rounds.items()})
+                    for region, rounds in regions.items()
+                }
+            ),
+            "teams": MappingProxyType(teams),
+        }
+    )
+
+
+def get_bracket_topology():
+    """Fetch the bracket, only reloading it when the results have changed"""
+    global _topology
+
+    (version,) = get_versions([RESULTS_VERSION])
+
+    if _topology is None or _topology[0] != version:
+        _topology = (version, load_bracket_topology())
+
+    return _topology[1]
+
+
+def copy_region(rounds):
+    """Copy one region of the bracket into plain, editable dicts"""
+    return {round: [dict(game) for game in games] for round, games in rounds.items()}
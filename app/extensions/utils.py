@@ -1,19 +1,21 @@
-import os
 import hashlib
+from datetime import datetime, timezone
 from functools import wraps
-from flask import redirect, url_for, session, current_app
-from app.extensions.constants import REGIONS
-from app.extensions.models import get_bracket_data_for_region
+from flask import redirect, session, request, make_response, render_template
+from markupsafe import Markup
+from app.extensions.cache import LRUCache
+from app.extensions.assets import get_logo_url
+from app.extensions.constants import REGIONS, LOCK_TIME, PAGE_CACHE_SIZE, BRACKET_CACHE_SIZE
+from app.extensions.db import db
+from app.extensions.models import User, get_user_picks
+from app.extensions.topology import get_bracket_topology, copy_region
+from app.extensions.versions import RESULTS_VERSION, get_versions, user_picks_version
 
+# etag -> rendered page
+_page_cache = LRUCache(PAGE_CACHE_SIZE)
 
-def create_secure_password(password, secret_key, hash_algo="sha256", iterations=100000):
-    salt = os.urandom(16)
-
-    hash_value = hashlib.pbkdf2_hmac(hash_algo, password.encode("utf-8") + secret_key.encode("utf-8"), salt, iterations)
-
-    password_hash = salt + hash_value
-
-    return password_hash[:16], password_hash[16:], hash_algo, iterations
+# (user id, picks version, results version, can edit) -> rendered bracket
+_bracket_cache = LRUCache(BRACKET_CACHE_SIZE)
 
 
 def logged_in(func):
@@ -29,19 +31,64 @@ def logged_in(func):
     return check_logged_in
 
 
-def get_team_logo(team_name):
-    """Return the static URL for team logo, preferring SVG, falling back to PNG."""
-    svg_path = os.path.join(current_app.static_folder, "images/team_logos", f"{team_name}.svg")
-    png_path = os.path.join(current_app.static_folder, "images/team_logos", f"{team_name}.png")
+def conditional_page(version_names, viewer=None):
+    """
+    Serve a page with an ETag built from the versions of the data it shows.
 
-    if os.path.exists(svg_path):
-        return url_for("static", filename=f"images/team_logos/{team_name}.svg")
+    `version_names` is called with the view arguments and returns the names of those versions, or None to skip
+    caching. Rendered pages are shared by every viewer, so a page that also depends on who is looking passes
+    `viewer`, called with the view arguments, returning what about the viewer changes it. Browsers holding the
+    current page get a 304, anyone else gets a copy rendered earlier for the same versions, so unchanged pages are
+    answered without rendering or querying them again.
+    """
 
-    elif os.path.exists(png_path):
-        return url_for("static", filename=f"images/team_logos/{team_name}.png")
+    def decorator(func):
+        @wraps(func)
+        def serve_conditional_page(*args, **kwargs):
+            names = version_names(**kwargs)
 
-    else:
-        return url_for("static", filename="images/team_logos/placeholder.svg")
+            if names is None:
+                return func(*args, **kwargs)
+
+            # Pages differ by filters, whether picks are locked, the day and, through the layout, whether the viewer
+            # is the admin. The viewer's own picks version is always read fresh, they may have just saved picks on
+            # another worker
+            now = datetime.now(timezone.utc)
+            versions = get_versions(names, uncached=[user_picks_version(session.get("user_id"))])
+            is_admin = session.get("user_id") == 1
+            parts = [request.full_path, now <= LOCK_TIME, now.date(), *zip(names, versions), is_admin]
+            if viewer is not None:
+                parts.append(viewer(**kwargs))
+            etag = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+            if etag in request.if_none_match:
+                response = make_response("", 304)
+            else:
+                body = _page_cache.get(etag)
+
+                if body is None:
+                    body = func(*args, **kwargs)
+
+                    # Only cache rendered pages, not redirects or errors
+                    if not isinstance(body, str):
+                        return body
+
+                    _page_cache.set(etag, body)
+
+                response = make_response(body)
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return serve_conditional_page
+
+    return decorator
+
+
+def get_team_logo(team_name):
+    """Return the fingerprinted URL for team logo, preferring SVG, falling back to PNG."""
+    return get_logo_url(team_name)
 
 def update_game_state(game, user_pick, source_game_num, team_names):
     """Update the state of a game"""
@@ -73,11 +120,13 @@ def update_game_state(game, user_pick, source_game_num, team_names):
 
     return game
 
-def create_users_bracket_data(user_picks, team_names):
+def create_users_bracket_data(user_picks, topology):
     """Create users bracket data"""
+    team_names = {team_id: team["name"] for team_id, team in topology["teams"].items()}
+
     bracket_data = {}
     for region in REGIONS:
-        rounds = get_bracket_data_for_region(region)
+        rounds = copy_region(topology["regions"][region])
 
         for round, games in rounds.items():
             for game in games:
@@ -99,3 +148,52 @@ def create_users_bracket_data(user_picks, team_names):
         bracket_data[region.replace(" ", "_").lower()] = rounds
 
     return bracket_data
+
+
+def get_bracket_page_data(user_id):
+    """Fetch everything the bracket page needs for one user"""
+    topology = get_bracket_topology()
+    user_picks = get_user_picks(user_id)
+    user = db.session.get(User, user_id)
+    winner = topology["teams"].get(user.winner_id)
+
+    return {
+        **create_users_bracket_data(user_picks, topology),
+        "winner": dict(winner) if winner else None,
+        "final_score": {"value": user.final_score},
+        "user_picks": user_picks,
+    }
+
+
+def render_bracket(user_id, can_edit):
+    """Render a user's bracket, reusing an earlier render while their picks and the results are unchanged"""
+    picks_version, results_version = get_versions([user_picks_version(user_id), RESULTS_VERSION])
+    key = (user_id, picks_version, results_version, can_edit)
+
+    bracket = _bracket_cache.get(key)
+
+    if bracket is None:
+        bracket = Markup(
+            render_template(
+                "partials/bracket.html",
+                **get_bracket_page_data(user_id),
+                get_team_logo=get_team_logo,
+                can_edit=can_edit,
+            )
+        )
+        _bracket_cache.set(key, bracket)
+
+    return bracket
+
+
+def invalidate_brackets(user_id=None):
+    """Drop cached brackets for one user after their picks change, or for everyone after a result"""
+    if user_id is None:
+        _bracket_cache.invalidate()
+    else:
+        _bracket_cache.invalidate(lambda key: key[0] == user_id)
+
+
+def get_cache_stats():
+    """Fetch the size and hit rate of the rendered page and bracket caches"""
+    return {"pages": _page_cache.stats(), "brackets": _bracket_cache.stats()}
@@ -0,0 +1,101 @@
+import click
+from flask.cli import with_appcontext
+
+from app.extensions.db import db
+from app.extensions.models import User, UserPick
+from app.extensions.encoding import get_bracket_layout, encode_bracket
+from app.extensions.scoring import refresh_user_scores
+
+
+def validate_bracket(picks):
+    """
+    Check picks, {game_id: team_id}, against the bracket in one pass from the first round onwards.
+
+    A pick is kept when its team plays in that game (first round), or was kept as the user's pick in the game it
+    comes from. Returns the consistent picks and the game ids of the picks that were dropped.
+    """
+    positions, team_slots = get_bracket_layout()
+    games_at = {position: game_id for game_id, position in positions.items()}
+
+    valid = {}
+    invalid = []
+
+    for game_id in sorted(picks, key=lambda game_id: positions.get(game_id, (0, 0))):
+        team_id = picks[game_id]
+
+        if game_id not in positions or team_id not in team_slots:
+            invalid.append(game_id)
+            continue
+
+        round, position = positions[game_id]
+        slot = team_slots[team_id]
+
+        # The team's first round slot must feed this game, and it must have been picked in the game before
+        consistent = slot >> round == position
+        if consistent and round > 1:
+            consistent = valid.get(games_at[(round - 1, slot >> (round - 1))]) == team_id
+
+        if consistent:
+            valid[game_id] = team_id
+        else:
+            invalid.append(game_id)
+
+    return valid, invalid
+
+
+def get_championship_game_id():
+    """Fetch the id of the championship game"""
+    positions, _ = get_bracket_layout()
+    return next(game_id for game_id, position in positions.items() if position == (6, 0))
+
+
+def audit_brackets(repair=False):
+    """
+    Validate every stored bracket in one sweep.
+
+    Returns the dropped game ids keyed by user id. With repair, the inconsistent picks are deleted and the
+    affected users' encoded brackets and scores are refreshed.
+    """
+    picks_by_user = {}
+    for pick in UserPick.query.all():
+        picks_by_user.setdefault(pick.user_id, {})[pick.game_id] = pick.predicted_winner_id
+
+    problems = {}
+    for user_id, picks in picks_by_user.items():
+        _, invalid = validate_bracket(picks)
+        if invalid:
+            problems[user_id] = invalid
+
+    if repair and problems:
+        for user_id, invalid in problems.items():
+            UserPick.query.filter(UserPick.user_id == user_id, UserPick.game_id.in_(invalid)).delete(
+                synchronize_session=False
+            )
+
+        for user in User.query.filter(User.user_id.in_(problems)).all():
+            valid = {g: t for g, t in picks_by_user[user.user_id].items() if g not in problems[user.user_id]}
+            user.bracket_bits, user.bracket_mask = encode_bracket(valid)
+
+        db.session.commit()
+        refresh_user_scores(problems)
+
+    return problems
+
+
+@click.command("audit-brackets")
+@click.option("--repair", is_flag=True, help="Delete the inconsistent picks.")
+@with_appcontext
+def audit_brackets_command(repair):
+    """Check every stored bracket for picks that don't follow from earlier rounds."""
+    problems = audit_brackets(repair=repair)
+
+    if not problems:
+        click.echo("All brackets are consistent.")
+        return
+
+    names = {user.user_id: user.name for user in User.query.filter(User.user_id.in_(problems)).all()}
+    for user_id, invalid in problems.items():
+        click.echo(f"{names.get(user_id, user_id)}: {len(invalid)} inconsistent picks")
+
+    if repair:
+        click.echo(f"Repaired {len(problems)} brackets.")
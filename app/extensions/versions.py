@@ -0,0 +1,70 @@
+import time
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions.db import db
+from app.extensions.models import StateVersion
+from app.extensions.constants import VERSION_CACHE_SECONDS
+
+# Tournament results, set by the admin
+RESULTS_VERSION = "results"
+
+# Any user's picks, or a new user joining
+PICKS_VERSION = "picks"
+
+# name -> (version, time it was read)
+_versions = {}
+
+
+def user_picks_version(user_id):
+    """Name of the version tracking a single user's picks"""
+    return f"picks:{user_id}"
+
+
+def get_versions(names, uncached=()):
+    """
+    Fetch the current version of each name.
+
+    Versions are kept in memory for a few seconds, so most requests don't touch the database at all. Changes made
+    by this process are seen straight away, changes made by other workers within VERSION_CACHE_SECONDS. Names in
+    `uncached` are always read from the database, for data the viewer has just changed, possibly on another worker.
+    """
+    now = time.monotonic()
+    stale = [
+        name
+        for name in names
+        if name in uncached or name not in _versions or now - _versions[name][1] > VERSION_CACHE_SECONDS
+    ]
+
+    if stale:
+        stored = dict(
+            db.session.query(StateVersion.name, StateVersion.version).filter(StateVersion.name.in_(stale)).all()
+        )
+        for name in stale:
+            _versions[name] = (stored.get(name, 0), now)
+
+    return [_versions[name][0] for name in names]
+
+
+def bump_versions(*names):
+    """Increment the given versions, call whenever the data behind them changes"""
+    for name in names:
+        result = db.session.execute(
+            update(StateVersion).where(StateVersion.name == name).values(version=StateVersion.version + 1)
+        )
+
+        if result.rowcount == 0:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(StateVersion(name=name, version=1))
+            except IntegrityError:
+                # Another worker created it at the same time, bump theirs instead
+                db.session.execute(
+                    update(StateVersion).where(StateVersion.name == name).values(version=StateVersion.version + 1)
+                )
+
+    db.session.commit()
+
+    # Forget the cached copies so this process sees its own change immediately
+    for name in names:
+        _versions.pop(name, None)
@@ -1,82 +1,154 @@
-from flask import Blueprint, render_template
-from app.extensions.utils import logged_in, get_team_logo
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, render_template, request, jsonify
+from app.extensions.utils import logged_in, get_team_logo, conditional_page
+from app.extensions.versions import RESULTS_VERSION, PICKS_VERSION
 from app.extensions.models import Game, Team, User, UserPick
+from app.extensions.constants import PICKERS_PAGE_SIZE, LIVE_RETRY_SECONDS
+from app.extensions.live import broadcaster, ensure_fetcher, stream_events
+from sqlalchemy import func
 from sqlalchemy.orm import aliased
 from app.extensions.db import db
 
 games_bp = Blueprint("games", __name__)
 
+GAME_STATUSES = ["upcoming", "live", "completed"]
 
-def format_upcoming_games(upcoming_games):
-    """Format the upcoming games for display"""
-    games = {}
-    for row in upcoming_games:
-        game_id = row.game_id
-        if game_id not in games:
-            games[game_id] = {
-                "game_id": game_id,
-                "round": row.round,
-                "game_time": row.game_time,
-                "team_1_id": row.team_1_id,
-                "team_1_name": row.team_1_name,
-                "team_1_seed": row.team_1_seed,
-                "team_2_id": row.team_2_id,
-                "team_2_name": row.team_2_name,
-                "team_2_seed": row.team_2_seed,
-                "team_1_pickers": [],
-                "team_2_pickers": [],
-            }
 
-        # Add pickers
-        if row.predicted_winner_id == row.team_1_id:
-            games[game_id]["team_1_pickers"].append(row.name.title())
-        elif row.predicted_winner_id == row.team_2_id:
-            games[game_id]["team_2_pickers"].append(row.name.title())
+def get_game_status(game, today):
+    """Work out whether a game is upcoming, live or completed"""
+    if game.winner_id is not None:
+        return "completed"
 
-    return list(games.values())
+    if game.game_time <= today:
+        return "live"
 
+    return "upcoming"
 
-def get_upcoming_games_with_picks():
-    """Fetch all upcoming games with user picks"""
+
+def get_games_with_pick_counts():
+    """Fetch every game with both teams set, along with how many users picked each team"""
     team_1 = aliased(Team)
     team_2 = aliased(Team)
-    user_pick = aliased(UserPick)
-    user = aliased(User)
 
-    upcoming_games = (
+    pick_counts = (
+        db.session.query(
+            UserPick.game_id,
+            UserPick.predicted_winner_id,
+            func.count().label("pick_count"),
+        )
+        .group_by(UserPick.game_id, UserPick.predicted_winner_id)
+        .subquery()
+    )
+    team_1_picks = aliased(pick_counts)
+    team_2_picks = aliased(pick_counts)
+
+    games = (
         db.session.query(
             Game.game_id,
             Game.round,
             Game.game_time,
+            Game.winner_id,
 
             Game.team_1_id,
             team_1.name.label("team_1_name"),
             team_1.seed.label("team_1_seed"),
+            func.coalesce(team_1_picks.c.pick_count, 0).label("team_1_picks"),
 
             Game.team_2_id,
             team_2.name.label("team_2_name"),
             team_2.seed.label("team_2_seed"),
+            func.coalesce(team_2_picks.c.pick_count, 0).label("team_2_picks"),
+        )
+        .join(team_1, Game.team_1_id == team_1.team_id)
+        .join(team_2, Game.team_2_id == team_2.team_id)
+        .outerjoin(
+            team_1_picks,
+            (team_1_picks.c.game_id == Game.game_id) & (team_1_picks.c.predicted_winner_id == Game.team_1_id),
+        )
+        .outerjoin(
+            team_2_picks,
+            (team_2_picks.c.game_id == Game.game_id) & (team_2_picks.c.predicted_winner_id == Game.team_2_id),
+        )
+        .order_by(Game.game_time.asc(), Game.round, Game.round_order)
+    ).all()
+
+    return games
+
 
-            user_pick.user_id,
-            user.name,
-            user_pick.predicted_winner_id
+def format_games(games, today):
+    """Format the games for display, grouped into upcoming, live and completed sections"""
+    sections = {status: [] for status in GAME_STATUSES}
+
+    for game in games:
+        total_picks = game.team_1_picks + game.team_2_picks
+        sections[get_game_status(game, today)].append(
+            {
+                **game._mapping,
+                "team_1_percent": round(100 * game.team_1_picks / total_picks) if total_picks else 0,
+                "team_2_percent": round(100 * game.team_2_picks / total_picks) if total_picks else 0,
+            }
         )
-        .outerjoin(team_1, Game.team_1_id == team_1.team_id)
-        .outerjoin(team_2, Game.team_2_id == team_2.team_id)
-        .outerjoin(user_pick, Game.game_id == user_pick.game_id)
-        .outerjoin(user, user_pick.user_id == user.user_id)
-        .filter(team_1.name.isnot(None))
-        .filter(team_2.name.isnot(None))
-        .order_by(Game.game_time.asc())
+
+    return sections
+
+
+def get_game_pickers(game_id, team_id, page):
+    """Fetch one page of the names of users who picked a team to win a game"""
+    names = (
+        db.session.query(User.name)
+        .join(UserPick, UserPick.user_id == User.user_id)
+        .filter(UserPick.game_id == game_id, UserPick.predicted_winner_id == team_id)
+        .order_by(User.name)
+        .offset((page - 1) * PICKERS_PAGE_SIZE)
+        .limit(PICKERS_PAGE_SIZE + 1)
     ).all()
 
-    return upcoming_games
+    return [name.title() for (name,) in names[:PICKERS_PAGE_SIZE]], len(names) > PICKERS_PAGE_SIZE
 
 
 @games_bp.route("/games", methods=["GET"])
 @logged_in
+@conditional_page(lambda: [RESULTS_VERSION, PICKS_VERSION])
 def games():
-    upcoming_games = get_upcoming_games_with_picks()
-    formatted_games = format_upcoming_games(upcoming_games)
+    status = request.args.get("status")
+    today = datetime.now(timezone.utc).date()
+    sections = format_games(get_games_with_pick_counts(), today)
+
+    if status in GAME_STATUSES:
+        sections = {status: sections[status]}
+
+    return render_template("games.html", sections=sections, status=status, get_team_logo=get_team_logo)
+
+
+@games_bp.route("/games/<int:game_id>/pickers", methods=["GET"])
+@logged_in
+def game_pickers(game_id):
+    """List the users who picked a team to win a game, a page at a time"""
+    team_id = request.args.get("team_id", type=int)
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    if team_id is None:
+        return jsonify({"success": False, "message": "Missing team!"}), 400
+
+    names, has_more = get_game_pickers(game_id, team_id, page)
+
+    return jsonify({"names": names, "page": page, "has_more": has_more})
+
+
+@games_bp.route("/games/stream", methods=["GET"])
+@logged_in
+def games_stream():
+    """Stream live scores and recorded results to the games page as server-sent events"""
+    client = broadcaster.subscribe()
+    if client is None:
+        response = Response("Too many live score streams, try again later", status=503)
+        response.headers["Retry-After"] = str(LIVE_RETRY_SECONDS)
+        return response
+
+    ensure_fetcher()
 
-    return render_template("games.html", games=formatted_games, get_team_logo=get_team_logo)
+    response = Response(stream_events(client), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
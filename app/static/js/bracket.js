@@ -149,6 +149,29 @@ function amendGameWinner(game, team) {
     }
 };
 
+function savePick(game, team) {
+    const teamId = team.dataset.teamId;
+
+    // Nothing to save when an empty slot is clicked
+    if (!teamId || teamId === "None" || team.textContent.trim() === "") {
+        return;
+    }
+
+    fetch(`/picks/game/${game.dataset.gameId}`, {
+        method: "PATCH",
+        headers: {
+            "Content-Type": "application/json"
+        },
+        body: JSON.stringify({ team_id: teamId })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (!data.success) {
+            showMessage("save-message", data.message, 5000);
+        }
+    });
+}
+
 function addGameCardListeners() {
     const games = document.querySelectorAll('.game-card, .championship-card');
     games.forEach(game => {
@@ -156,6 +179,7 @@ function addGameCardListeners() {
             selected_team = e.target.closest(".team-row");
             amendGameWinner(game, selected_team)
             advanceTeam(game, selected_team)
+            savePick(game, selected_team)
         });
     })
 }
@@ -17,4 +17,66 @@ function addSearchGamesListener() {
     });
 }
 
-addSearchGamesListener();
\ No newline at end of file
+addSearchGamesListener();
+function addShowPickersListener() {
+    document.querySelectorAll(".show-pickers").forEach(button => {
+        button.addEventListener("click", function() {
+            const page = parseInt(this.dataset.page);
+            const url = `/games/${this.dataset.gameId}/pickers?team_id=${this.dataset.teamId}&page=${page}`;
+
+            fetch(url)
+                .then(response => response.json())
+                .then(data => {
+                    const list = this.parentElement.querySelector(".picker-names");
+                    list.textContent = [list.textContent, data.names.join(", ")].filter(Boolean).join(", ");
+
+                    // Keep the button around while there are more names to load
+                    if (data.has_more) {
+                        this.dataset.page = page + 1;
+                        this.innerText = "Show more";
+                    } else {
+                        this.remove();
+                    }
+                })
+                .catch(error => console.error("Error loading pickers:", error));
+        });
+    });
+}
+
+addShowPickersListener();
+
+function addLiveScoresListener() {
+    const source = new EventSource("/games/stream");
+
+    // A busy server turns the stream away and the browser gives up on it, so try again later
+    source.addEventListener("error", function() {
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(addLiveScoresListener, 30000);
+        }
+    });
+
+    source.addEventListener("score", function(event) {
+        const data = JSON.parse(event.data);
+        const card = document.querySelector(`.game-card-upcoming[data-game-id="${data.game_id}"]`);
+        if (!card) return;
+
+        for (const [teamId, score] of Object.entries(data.scores)) {
+            const team = card.querySelector(`.team[data-team-id="${teamId}"] .team-score`);
+            if (team) team.innerText = score;
+        }
+
+        card.querySelector(".game-clock").innerText = data.state === "live" ? `${data.period} ${data.clock}` : data.period;
+    });
+
+    source.addEventListener("result", function(event) {
+        const data = JSON.parse(event.data);
+        const card = document.querySelector(`.game-card-upcoming[data-game-id="${data.game_id}"]`);
+        if (!card) return;
+
+        card.querySelectorAll(".team").forEach(team => {
+            team.classList.toggle("winner", team.dataset.teamId === String(data.winner_id));
+        });
+    });
+}
+
+addLiveScoresListener();
@@ -0,0 +1,180 @@
+"""
+Concurrency benchmark: how long reads take while a burst of /submit-picks writes is going on.
+
+Readers load the pickers of the championship game, which isn't cached so every read goes to the database.
+
+Runs against a throwaway SQLite database, once with each journal mode, e.g.
+
+    python benchmarks/concurrency.py --writers 8 --readers 4 --submits 25
+
+With the rollback journal ("delete") readers wait behind every pick write, with WAL they don't.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+from statistics import median, quantiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+JOURNAL_MODES = ["delete", "wal"]
+
+
+def random_bracket(games, rng):
+    """A random but consistent set of picks, {game_id: team_id}"""
+    picks = {}
+
+    for game in sorted(games, key=lambda game: (game.round, game.round_order)):
+        if game.round == 1:
+            teams = [game.team_1_id, game.team_2_id]
+        else:
+            teams = [picks.get(game.source_game_1), picks.get(game.source_game_2)]
+
+        teams = [team_id for team_id in teams if team_id]
+        if teams:
+            picks[game.game_id] = rng.choice(teams)
+
+    return picks
+
+
+def create_users(app, count):
+    """Add users with a bracket each, returning their ids and two brackets for every writer to alternate between"""
+    from app.extensions.db import db
+    from app.extensions.models import Game, User, UserPick, UserScore
+
+    rng = random.Random(1)
+
+    with app.app_context():
+        games = Game.query.all()
+        user_ids = []
+
+        for i in range(count):
+            user = User(name=f"bench{i}", final_score=0, hash_algo="sha256", iterations=1)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(UserScore(user_id=user.user_id))
+
+            for game_id, team_id in random_bracket(games, rng).items():
+                db.session.add(UserPick(user_id=user.user_id, game_id=game_id, predicted_winner_id=team_id))
+
+            user_ids.append(user.user_id)
+
+        db.session.commit()
+        brackets = [random_bracket(games, rng) for _ in range(2)]
+
+        # The championship game, and the team the writers' first bracket picks to win it
+        game_id = max(game.game_id for game in games if game.round == max(game.round for game in games))
+        pickers_path = f"/games/{game_id}/pickers?team_id={brackets[0][game_id]}"
+
+    return user_ids, brackets, pickers_path
+
+
+def log_in(client, user_id):
+    with client.session_transaction() as session:
+        session["loggedin"] = True
+        session["user_id"] = user_id
+        session["user_name"] = f"bench{user_id}"
+
+
+def run_writer(app, user_id, brackets, submits, statuses):
+    client = app.test_client()
+    log_in(client, user_id)
+
+    for i in range(submits):
+        picks = brackets[i % 2]
+        response = client.post(
+            "/submit-picks",
+            json={"user_picks": [{"game_id": game_id, "team_id": team_id} for game_id, team_id in picks.items()]},
+        )
+        statuses.append(response.status_code)
+
+
+def run_reader(app, user_id, path, stop, latencies, statuses):
+    client = app.test_client()
+    log_in(client, user_id)
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+
+def run_benchmark(journal_mode, writers, readers, submits):
+    """Run one burst in this process, printing the read latencies and write results"""
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["SQLITE_JOURNAL_MODE"] = journal_mode
+    os.environ.setdefault("FLASK_SECRET_KEY", "benchmark")
+
+    import app.bracket.routes
+    from app import create_app
+    from app.extensions.seed import setup_db_command
+
+    # Picks are locked after the tournament starts, move the lock into the future for the benchmark
+    app.bracket.routes.LOCK_TIME = datetime(9999, 1, 1, tzinfo=timezone.utc)
+
+    flask_app = create_app()
+    flask_app.test_cli_runner().invoke(setup_db_command)
+    user_ids, brackets, pickers_path = create_users(flask_app, writers + readers)
+
+    latencies, read_statuses, write_statuses = [], [], []
+    stop = threading.Event()
+
+    reader_threads = [
+        threading.Thread(target=run_reader, args=(flask_app, user_id, pickers_path, stop, latencies, read_statuses))
+        for user_id in user_ids[writers:]
+    ]
+    writer_threads = [
+        threading.Thread(target=run_writer, args=(flask_app, user_id, brackets, submits, write_statuses))
+        for user_id in user_ids[:writers]
+    ]
+
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    p95 = quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(
+        f"{journal_mode:>6}: {len(write_statuses)} submits in {elapsed:.2f}s "
+        f"({write_statuses.count(200)} ok), {len(latencies)} reads "
+        f"({read_statuses.count(200)} ok), read p50 {median(latencies) * 1000:.1f}ms "
+        f"p95 {p95 * 1000:.1f}ms max {max(latencies) * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8, help="Users submitting picks at the same time")
+    parser.add_argument("--readers", type=int, default=4, help="Users loading the pickers at the same time")
+    parser.add_argument("--submits", type=int, default=25, help="Pick submissions per writer")
+    parser.add_argument("--journal-mode", choices=JOURNAL_MODES, help="Run only this journal mode")
+    args = parser.parse_args()
+
+    if args.journal_mode:
+        run_benchmark(args.journal_mode, args.writers, args.readers, args.submits)
+        return
+
+    # Each mode runs in its own process so caches and engines from one run can't leak into the other
+    for journal_mode in JOURNAL_MODES:
+        subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], "--journal-mode", journal_mode],
+            check=True,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+if __name__ == "__main__":
+    main()
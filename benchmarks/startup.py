@@ -0,0 +1,66 @@
+"""
+Startup benchmark: how long a fresh worker takes to import the app and run create_app.
+
+Each run is a new Python process, like a worker booting, e.g.
+
+    DATABASE_URL=sqlite:///march_madness.db python benchmarks/startup.py --runs 10
+
+Also lists which heavy modules were loaded by startup, they should only be imported when first used.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["numpy", "requests", "alembic", "flask_migrate"]
+
+# Run in each fresh process, prints the timings as JSON
+BOOT = f"""
+import sys, json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "create_app": created - imported,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def boot():
+    """Time one cold start in a new process"""
+    env = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://")}
+    env.setdefault("FLASK_SECRET_KEY", "benchmark")
+
+    output = subprocess.run(
+        [sys.executable, "-c", BOOT], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts to time")
+    args = parser.parse_args()
+
+    runs = [boot() for _ in range(args.runs)]
+
+    for step in ["import", "create_app"]:
+        timings = [run[step] * 1000 for run in runs]
+        print(f"{step:>10}: median {median(timings):.1f}ms, min {min(timings):.1f}ms, max {max(timings):.1f}ms")
+
+    totals = [(run["import"] + run["create_app"]) * 1000 for run in runs]
+    print(f"{'total':>10}: median {median(totals):.1f}ms")
+    print(f"{'loaded':>10}: {', '.join(runs[0]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
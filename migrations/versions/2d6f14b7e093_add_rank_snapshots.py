@@ -0,0 +1,32 @@
+"""Add rank snapshots
+
+Revision ID: 2d6f14b7e093
+Revises: 9c3b58e1a6f4
+Create Date: 2026-10-18 12:04:33.871250
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6f14b7e093'
+down_revision = '9c3b58e1a6f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rank_snapshots',
+    sa.Column('snapshot_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('games_completed', sa.Integer(), nullable=False),
+    sa.Column('user_ids', sa.LargeBinary(), nullable=False),
+    sa.Column('points', sa.LargeBinary(), nullable=False),
+    sa.Column('ranks', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('snapshot_id')
+    )
+
+
+def downgrade():
+    op.drop_table('rank_snapshots')
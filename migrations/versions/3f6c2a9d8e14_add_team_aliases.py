@@ -0,0 +1,29 @@
+"""Add team aliases
+
+Revision ID: 3f6c2a9d8e14
+Revises: e5a90f3c7d28
+Create Date: 2026-10-18 16:21:48.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a9d8e14'
+down_revision = 'e5a90f3c7d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask seed-team-aliases` afterwards to add the known NCAA feed names
+    op.create_table('team_aliases',
+    sa.Column('alias', sa.String(length=100), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('alias')
+    )
+
+
+def downgrade():
+    op.drop_table('team_aliases')
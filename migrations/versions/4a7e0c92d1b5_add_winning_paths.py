@@ -0,0 +1,26 @@
+"""Add winning paths to user scores
+
+Revision ID: 4a7e0c92d1b5
+Revises: bd01b639c0fc
+Create Date: 2026-10-18 10:41:09.137264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7e0c92d1b5'
+down_revision = 'bd01b639c0fc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_scores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('winning_paths', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_scores', schema=None) as batch_op:
+        batch_op.drop_column('winning_paths')
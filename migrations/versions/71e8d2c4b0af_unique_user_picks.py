@@ -0,0 +1,32 @@
+"""Unique pick per user and game
+
+Revision ID: 71e8d2c4b0af
+Revises: 2d6f14b7e093
+Create Date: 2026-10-18 13:15:48.390561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71e8d2c4b0af'
+down_revision = '2d6f14b7e093'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only the latest pick where a user somehow has several for the same game
+    op.execute(
+        "DELETE FROM user_picks WHERE pick_id NOT IN "
+        "(SELECT keep_id FROM (SELECT MAX(pick_id) AS keep_id FROM user_picks GROUP BY user_id, game_id) AS latest)"
+    )
+
+    with op.batch_alter_table('user_picks', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_picks_user_id_game_id', ['user_id', 'game_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('user_picks', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_picks_user_id_game_id', type_='unique')
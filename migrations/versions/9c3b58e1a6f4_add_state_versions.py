@@ -0,0 +1,29 @@
+"""Add state versions
+
+Revision ID: 9c3b58e1a6f4
+Revises: 4a7e0c92d1b5
+Create Date: 2026-10-18 11:26:52.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3b58e1a6f4'
+down_revision = '4a7e0c92d1b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    state_versions = op.create_table('state_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(state_versions, [{'name': 'results', 'version': 0}, {'name': 'picks', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('state_versions')
@@ -0,0 +1,47 @@
+"""Add query indexes
+
+Revision ID: b8e41d7c2f59
+Revises: 3f6c2a9d8e14
+Create Date: 2026-10-18 20:52:11.604823
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e41d7c2f59'
+down_revision = '3f6c2a9d8e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.create_index('ix_games_region_round_round_order', ['region', 'round', 'round_order'], unique=False)
+        batch_op.create_index('ix_games_source_game_1', ['source_game_1'], unique=False)
+        batch_op.create_index('ix_games_source_game_2', ['source_game_2'], unique=False)
+
+    with op.batch_alter_table('user_picks', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_user_picks_game_id_predicted_winner_id', ['game_id', 'predicted_winner_id', 'user_id'], unique=False
+        )
+
+    # Fails if two users already share a name in any case, rename one of them first
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('uq_users_name', ['name'], unique=True)
+        batch_op.create_index('ix_users_lower_name', [sa.text('lower(name)')], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_lower_name')
+        batch_op.drop_index('uq_users_name')
+
+    with op.batch_alter_table('user_picks', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_picks_game_id_predicted_winner_id')
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index('ix_games_source_game_2')
+        batch_op.drop_index('ix_games_source_game_1')
+        batch_op.drop_index('ix_games_region_round_round_order')
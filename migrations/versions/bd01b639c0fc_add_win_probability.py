@@ -0,0 +1,26 @@
+"""Add win probability to user scores
+
+Revision ID: bd01b639c0fc
+Revises: f15e21302ff0
+Create Date: 2026-10-18 10:03:27.518902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bd01b639c0fc'
+down_revision = 'f15e21302ff0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_scores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('win_probability', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_scores', schema=None) as batch_op:
+        batch_op.drop_column('win_probability')
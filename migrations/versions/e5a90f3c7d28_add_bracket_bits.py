@@ -0,0 +1,29 @@
+"""Add encoded bracket to users
+
+Revision ID: e5a90f3c7d28
+Revises: 71e8d2c4b0af
+Create Date: 2026-10-18 14:02:17.745390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a90f3c7d28'
+down_revision = '71e8d2c4b0af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Run `flask encode-brackets` afterwards to fill these in from the existing picks
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bracket_bits', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('bracket_mask', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('bracket_mask')
+        batch_op.drop_column('bracket_bits')
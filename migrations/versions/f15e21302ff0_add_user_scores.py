@@ -0,0 +1,45 @@
+"""Add user scores
+
+Revision ID: f15e21302ff0
+Revises: c9799acf8e82
+Create Date: 2026-10-18 09:12:41.220417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f15e21302ff0'
+down_revision = 'c9799acf8e82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_scores',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_points', sa.Integer(), nullable=False),
+    sa.Column('max_points', sa.Integer(), nullable=False),
+    sa.Column('correct_picks', sa.Integer(), nullable=False),
+    sa.Column('round_1_points', sa.Integer(), nullable=False),
+    sa.Column('round_2_points', sa.Integer(), nullable=False),
+    sa.Column('round_3_points', sa.Integer(), nullable=False),
+    sa.Column('round_4_points', sa.Integer(), nullable=False),
+    sa.Column('round_5_points', sa.Integer(), nullable=False),
+    sa.Column('round_6_points', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_scores_current_points', 'user_scores', ['current_points', 'user_id'], unique=False)
+
+    # Every user gets an empty row, run `flask rebuild-scores` to fill in the real values
+    op.execute(
+        "INSERT INTO user_scores (user_id, current_points, max_points, correct_picks, round_1_points, "
+        "round_2_points, round_3_points, round_4_points, round_5_points, round_6_points) "
+        "SELECT user_id, 0, 0, 0, 0, 0, 0, 0, 0, 0 FROM users"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_scores_current_points', table_name='user_scores')
+    op.drop_table('user_scores')
@@ -0,0 +1,11 @@
+"""
+Entry point for the process serving the live score stream, /games/stream.
+
+Run it under gevent, where each open stream is a greenlet instead of a worker thread, and route /games/stream to it
+while main.py serves everything else, e.g.
+
+    gunicorn --worker-class gevent --worker-connections 2000 --workers 1 --bind :8081 stream:app
+"""
+from app import create_app
+
+app = create_app()
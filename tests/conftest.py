@@ -0,0 +1,138 @@
+import os
+import json
+import random
+import threading
+import itertools
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import create_app
+from app.extensions import ncaa_api
+from app.extensions.db import db
+from app.extensions.models import Game, User, UserPick, UserScore
+from app.extensions.seed import setup_db_command
+
+_user_numbers = itertools.count()
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """The app on a fresh, migrated and seeded SQLite database shared by every test"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    os.environ["FLASK_SECRET_KEY"] = "test"
+
+    app = create_app()
+    app.config["TESTING"] = True
+
+    result = app.test_cli_runner().invoke(setup_db_command)
+    assert result.exit_code == 0, result.output
+
+    return app
+
+
+@pytest.fixture(autouse=True)
+def app_context(app):
+    with app.app_context():
+        yield
+        db.session.remove()
+
+
+def random_bracket(games, rng):
+    """A random but consistent bracket, {game_id: team_id}"""
+    picks = {}
+
+    for game in sorted(games, key=lambda game: (game.round, game.round_order)):
+        if game.round == 1:
+            teams = [game.team_1_id, game.team_2_id]
+        else:
+            teams = [picks.get(game.source_game_1), picks.get(game.source_game_2)]
+
+        picks[game.game_id] = rng.choice(teams)
+
+    return picks
+
+
+@pytest.fixture
+def add_users():
+    """Add users with random brackets, returning their ids"""
+
+    def add(count, seed=0):
+        rng = random.Random(seed)
+        games = Game.query.all()
+        user_ids = []
+
+        for _ in range(count):
+            user = User(name=f"user{next(_user_numbers)}", final_score=0, hash_algo="sha256", iterations=1)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(UserScore(user_id=user.user_id))
+
+            picks = random_bracket(games, rng)
+            for game_id, team_id in picks.items():
+                db.session.add(UserPick(user_id=user.user_id, game_id=game_id, predicted_winner_id=team_id))
+            user.winner_id = picks[max(picks)]
+
+            user_ids.append(user.user_id)
+
+        db.session.commit()
+        return user_ids
+
+    return add
+
+
+@pytest.fixture
+def log_in(app):
+    """A test client logged in as a user"""
+
+    def client_for(user_id):
+        user = db.session.get(User, user_id)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["loggedin"] = True
+            session["user_id"] = user_id
+            session["user_name"] = user.name if user else f"user{user_id}"
+        return client
+
+    return client_for
+
+
+@pytest.fixture
+def feed_server(app, monkeypatch):
+    """
+    A local HTTP server replaying the recorded NCAA scoreboard in fixtures, which the app polls instead of the
+    real feed. Change server.feed to change what it serves, server.paths lists the requests it got
+    """
+    feed = json.loads((FIXTURES / "ncaa_scoreboard.json").read_text())
+    paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            paths.append(self.path)
+            body = json.dumps(server.feed).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.feed = feed
+    server.paths = paths
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Every poll goes to the server rather than the shared response cache
+    monkeypatch.setitem(app.config, "NCAA_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(ncaa_api, "_responses", {})
+    monkeypatch.setattr(ncaa_api, "NCAA_CACHE_SECONDS", 0)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,24 @@
+from app.extensions.assets import IMMUTABLE_CACHE_CONTROL, asset_url
+
+
+def test_asset_is_served_only_under_its_current_fingerprint(app):
+    client = app.test_client()
+    url = asset_url("css/games.css")
+    filename = url.split("/", 3)[3]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    # An old fingerprint isn't cached forever as the current file, it is sent on to the current URL
+    response = client.get(f"/assets/000000000000/{filename}")
+    assert response.status_code == 302
+    assert response.location == url
+    assert response.headers.get("Cache-Control") != IMMUTABLE_CACHE_CONTROL
+
+    assert client.get("/assets/000000000000/css/missing.css").status_code == 404
+
+
+def test_unknown_asset_falls_back_to_its_static_url(app):
+    with app.test_request_context():
+        assert asset_url("css/missing.css") == "/static/css/missing.css"
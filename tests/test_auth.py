@@ -0,0 +1,25 @@
+from app.auth import routes as auth_routes
+from app.extensions.db import db
+from app.extensions.models import User
+
+
+def register(client, name):
+    return client.post("/register", data={"name": name, "password": "secret"}).get_data(as_text=True)
+
+
+def test_names_are_unique_in_any_case(app, add_users):
+    (user_id,) = add_users(1)
+    name = db.session.get(User, user_id).name
+
+    assert "already exists" in register(app.test_client(), name.upper())
+
+
+def test_name_registered_at_the_same_time_already_exists(app, add_users, monkeypatch):
+    (user_id,) = add_users(1)
+    name = db.session.get(User, user_id).name
+
+    # The other registration commits between this one's check and its insert
+    monkeypatch.setattr(auth_routes, "name_taken", lambda name: False)
+
+    assert "already exists" in register(app.test_client(), name.title())
+    assert User.query.filter(db.func.lower(User.name) == name).count() == 1
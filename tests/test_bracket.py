@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, insert
+
+import app.bracket.routes
+from app.extensions.db import db
+from app.extensions.models import Game, User, UserPick
+from app.extensions.validation import get_championship_game_id
+
+
+@pytest.fixture(autouse=True)
+def unlocked(monkeypatch):
+    """Picks are locked once the tournament starts, keep them open for these tests"""
+    monkeypatch.setattr(app.bracket.routes, "LOCK_TIME", datetime(9999, 1, 1, tzinfo=timezone.utc))
+
+
+def test_save_pick_needs_a_logged_in_user(app):
+    game = Game.query.filter_by(round=1).first()
+
+    response = app.test_client().patch(f"/picks/game/{game.game_id}", json={"team_id": game.team_1_id})
+
+    assert response.status_code == 401
+    assert not response.get_json()["success"]
+
+
+def test_save_pick_rejects_a_body_that_isnt_json(add_users, log_in):
+    (user_id,) = add_users(1)
+    game = Game.query.filter_by(round=1).first()
+
+    response = log_in(user_id).patch(f"/picks/game/{game.game_id}", data="team_id=1")
+
+    assert response.status_code == 400
+    assert UserPick.query.filter_by(user_id=user_id, game_id=game.game_id).count() == 1
+
+
+def test_save_pick_saves_over_a_pick_inserted_at_the_same_time(add_users, log_in):
+    (user_id,) = add_users(1)
+    game = Game.query.filter_by(round=1).first()
+    UserPick.query.filter_by(user_id=user_id).delete()
+    db.session.commit()
+
+    # Another request inserts the same pick between this one's read and its insert
+    @event.listens_for(db.session, "before_flush", once=True)
+    def insert_from_another_request(*args):
+        with db.engine.begin() as connection:
+            connection.execute(
+                insert(UserPick).values(user_id=user_id, game_id=game.game_id, predicted_winner_id=game.team_1_id)
+            )
+
+    response = log_in(user_id).patch(f"/picks/game/{game.game_id}", json={"team_id": game.team_2_id})
+
+    assert response.status_code == 200
+    assert [pick.predicted_winner_id for pick in UserPick.query.filter_by(user_id=user_id)] == [game.team_2_id]
+
+
+def submit(client, picks, **data):
+    return client.post(
+        "/submit-picks",
+        json={"user_picks": [{"game_id": game_id, "team_id": team_id} for game_id, team_id in picks.items()], **data},
+    )
+
+
+def test_submit_picks_takes_the_winner_from_the_valid_championship_pick(add_users, log_in):
+    (user_id,) = add_users(1)
+    picks = {pick.game_id: pick.predicted_winner_id for pick in UserPick.query.filter_by(user_id=user_id)}
+    championship = db.session.get(Game, get_championship_game_id())
+    finalists = {picks[championship.source_game_1], picks[championship.source_game_2]}
+    other_team_id = next(team_id for team_id in picks.values() if team_id not in finalists)
+    client = log_in(user_id)
+
+    # A posted winner that isn't the championship pick is ignored
+    assert submit(client, picks, winner_id=other_team_id).get_json()["success"]
+    assert db.session.get(User, user_id).winner_id == picks[championship.game_id]
+
+    # A championship pick that didn't reach the final is dropped, along with the posted winner
+    picks[championship.game_id] = other_team_id
+    assert submit(client, picks, winner_id=other_team_id).get_json()["success"]
+    db.session.expire_all()
+    assert db.session.get(User, user_id).winner_id is None
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+
+from app.extensions.db import db
+from app.extensions.elimination import count_winning_paths
+from app.extensions.models import Game, Team
+from app.extensions.simulation import build_simulation_inputs
+
+from conftest import random_bracket
+
+
+def score_outcome(inputs, outcome):
+    """Every user's final score for one outcome of the remaining games"""
+    slot_teams, slot_sources, columns = inputs["slot_teams"], inputs["slot_sources"], inputs["columns"]
+    winners = []
+    scores = inputs["base_points"].astype(np.int64)
+
+    for depth in range(len(slot_teams)):
+        slot = (outcome >> depth) & 1
+        source = slot_sources[depth, slot]
+        winners.append(winners[source] if source >= 0 else slot_teams[depth, slot])
+        scores += inputs["points"][columns[depth, winners[-1]]].astype(np.int64)
+
+    return scores
+
+
+def brute_force_winning_paths(inputs):
+    """Score every outcome of the remaining games one by one, counting each user's outcomes in first place"""
+    paths = np.zeros(len(inputs["base_points"]), dtype=np.int64)
+
+    for outcome in range(1 << len(inputs["slot_teams"])):
+        scores = score_outcome(inputs, outcome)
+        paths[scores == scores.max()] += 1
+
+    return paths
+
+
+def test_winning_paths_match_brute_force():
+    games = Game.query.all()
+    seeds = {team.team_id: team.seed for team in Team.query.all()}
+    rng = random.Random(5)
+
+    # Everything up to the elite eight has been played, leaving 7 games
+    results = random_bracket(games, rng)
+    for game in games:
+        if game.round <= 3:
+            game.winner_id = results[game.game_id]
+
+    # Some users share a bracket, so ties are counted for everyone in them
+    brackets = [random_bracket(games, rng) for _ in range(8)]
+    brackets += brackets[:2]
+    user_ids = list(range(1, len(brackets) + 1))
+    picks_by_user = {
+        user_id: {game_id: (team_id, seeds[team_id]) for game_id, team_id in bracket.items()}
+        for user_id, bracket in zip(user_ids, brackets)
+    }
+
+    try:
+        inputs = build_simulation_inputs(games, seeds, user_ids, picks_by_user)
+    finally:
+        db.session.rollback()
+
+    paths, examples, total = count_winning_paths(inputs)
+
+    assert total == 1 << 7
+    assert np.array_equal(paths, brute_force_winning_paths(inputs))
+    assert ((examples >= 0) == (paths > 0)).all()
+
+    for user, example in enumerate(examples):
+        if example >= 0:
+            scores = score_outcome(inputs, example)
+            assert scores[user] == scores.max()
@@ -0,0 +1,39 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions.encoding import decode_bracket, encode_bracket, encode_results, score_encoded_bracket
+from app.extensions.models import Game, Team
+from app.extensions.scoring import calculate_user_score
+
+from conftest import random_bracket
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_decoding_an_encoded_bracket_gives_it_back(seed):
+    bracket = random_bracket(Game.query.all(), random.Random(seed))
+
+    assert decode_bracket(*encode_bracket(bracket)) == bracket
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bitwise_scores_match_row_scores(seed):
+    rng = random.Random(seed)
+    games = Game.query.all()
+    seeds = {team.team_id: team.seed for team in Team.query.all()}
+    rounds = {game.game_id: game.round for game in games}
+    bracket = random_bracket(games, rng)
+
+    # Results of the tournament played up to a random round
+    played_rounds = rng.randint(0, 6)
+    results = {g: t for g, t in random_bracket(games, rng).items() if rounds[g] <= played_rounds}
+    completed_games = {g: SimpleNamespace(round=rounds[g], winner_id=t) for g, t in results.items()}
+
+    current_points, correct_picks, round_scores = score_encoded_bracket(
+        *encode_bracket(bracket), encode_results(results)
+    )
+    expected = calculate_user_score({g: (t, seeds[t]) for g, t in bracket.items()}, completed_games)
+
+    assert (current_points, correct_picks) == expected[:2]
+    assert {r: p for r, p in round_scores.items() if p} == dict(expected[2])
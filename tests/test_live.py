@@ -0,0 +1,65 @@
+import sys
+import json
+from types import SimpleNamespace
+
+from app.extensions.live import broadcaster, get_max_streams
+from app.extensions.constants import LIVE_MAX_STREAMS, LIVE_MAX_STREAMS_GEVENT
+from app.extensions.models import Game, Team
+
+
+def read_events(response):
+    """Parse server-sent events from a streamed response as they arrive, skipping keep-alives"""
+    for chunk in response.response:
+        if chunk.startswith(b":"):
+            continue
+        event, data = chunk.decode().strip().split("\n")
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_stream_sends_scores_from_the_feed(feed_server, log_in):
+    kansas = Team.query.filter_by(name="Kansas").one()
+    game = Game.query.filter(Game.round == 1, Game.team_1_id == kansas.team_id).one()
+
+    response = log_in(1).get("/games/stream", buffered=False)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+
+        event = next(data for event, data in read_events(response) if data["game_id"] == game.game_id)
+
+        assert feed_server.paths
+        assert event["state"] == "live"
+        assert event["period"] == "2nd"
+        assert event["scores"] == {str(game.team_1_id): "38", str(game.team_2_id): "35"}
+    finally:
+        response.close()
+
+    assert broadcaster.subscriber_count() == 0
+
+
+def test_streams_are_capped_per_worker(feed_server, log_in, monkeypatch):
+    monkeypatch.setattr(broadcaster, "max_subscribers", 1)
+    client = log_in(1)
+
+    first = client.get("/games/stream", buffered=False)
+    try:
+        turned_away = client.get("/games/stream")
+
+        assert turned_away.status_code == 503
+        assert turned_away.headers["Retry-After"] == "30"
+    finally:
+        first.close()
+
+    assert broadcaster.subscriber_count() == 0
+
+    second = client.get("/games/stream", buffered=False)
+    second.close()
+    assert second.status_code == 200
+
+
+def test_gevent_workers_serve_many_more_streams(monkeypatch):
+    monkeypatch.delenv("LIVE_MAX_STREAMS", raising=False)
+    assert get_max_streams() == LIVE_MAX_STREAMS
+
+    monkeypatch.setitem(sys.modules, "gevent.monkey", SimpleNamespace(is_module_patched=lambda name: True))
+    assert get_max_streams() == LIVE_MAX_STREAMS_GEVENT
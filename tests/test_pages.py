@@ -0,0 +1,27 @@
+from app.extensions.db import db
+from app.extensions.models import User
+from app.extensions.utils import _page_cache
+
+
+def test_rendered_pages_are_shared_between_viewers(add_users, log_in):
+    # Neither is the admin, who sees an extra link
+    first, second = [user_id for user_id in add_users(3) if user_id != 1][:2]
+    _page_cache.invalidate()
+
+    page = log_in(first).get("/scoreboard")
+    hits = _page_cache.stats()["hits"]
+
+    assert log_in(second).get("/scoreboard").data == page.data
+    assert _page_cache.stats()["hits"] == hits + 1
+    assert _page_cache.stats()["size"] == 1
+
+
+def test_pages_that_depend_on_the_viewer_are_cached_per_viewer(add_users, log_in):
+    owner, other = add_users(2)
+    name = db.session.get(User, owner).name
+
+    owner_page = log_in(owner).get(f"/picks/{name}")
+    other_page = log_in(other).get(f"/picks/{name}")
+
+    assert owner_page.headers["ETag"] != other_page.headers["ETag"]
+    assert owner_page.data != other_page.data
@@ -0,0 +1,25 @@
+from app.extensions.db import db
+from app.extensions.models import Game, Team
+from app.extensions.poller import poll_results
+from app.extensions.results import apply_results
+
+
+def winners():
+    names = dict(db.session.query(Team.team_id, Team.name).all())
+    return {game.game_id: names[game.winner_id] for game in Game.query.filter(Game.winner_id.isnot(None))}
+
+
+def test_poll_records_each_finished_game_once(feed_server):
+    try:
+        recorded, _ = poll_results()
+
+        # The live game and the game between teams outside the tournament aren't recorded
+        assert recorded == 3
+        assert sorted(winners().values()) == ["Duke", "Furman", "Michigan St."]
+
+        recorded, _ = poll_results()
+
+        assert recorded == 0
+        assert len(feed_server.paths) == 2
+    finally:
+        apply_results([(game_id, None) for game_id in winners()])
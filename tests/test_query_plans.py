@@ -0,0 +1,9 @@
+from app.extensions.query_plans import check_query_plans
+
+
+def test_hot_queries_use_indexes(add_users):
+    add_users(5)
+
+    full_scans = {name: tables for name, (plan, tables) in check_query_plans().items() if tables}
+
+    assert full_scans == {}
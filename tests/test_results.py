@@ -0,0 +1,50 @@
+import app.extensions.simulation
+from app.extensions.db import db
+from app.extensions.models import Game
+from app.extensions.results import apply_results
+from app.extensions.versions import RESULTS_VERSION, get_versions
+
+
+def test_failing_receiver_still_expires_cached_pages(monkeypatch, caplog):
+    def fail():
+        raise RuntimeError("simulation failed")
+
+    monkeypatch.setattr(app.extensions.simulation, "update_win_probabilities", fail)
+    game = Game.query.filter_by(round=1).first()
+    (version,) = get_versions([RESULTS_VERSION], uncached=[RESULTS_VERSION])
+
+    try:
+        apply_results([(game.game_id, game.team_1_id)])
+
+        assert db.session.get(Game, game.game_id).winner_id == game.team_1_id
+        assert get_versions([RESULTS_VERSION], uncached=[RESULTS_VERSION]) == [version + 1]
+        assert "refresh_win_probabilities failed" in caplog.text
+    finally:
+        apply_results([(game.game_id, None)])
+
+
+def test_admin_shows_an_invalid_result(app, log_in):
+    client = log_in(1)
+    with client.session_transaction() as session:
+        session["user_name"] = "tom"
+    game = Game.query.filter_by(round=2).first()
+
+    response = client.post("/admin", data={"game_id": "", "winner_id": ""})
+    assert response.status_code == 400
+
+    response = client.post("/admin", data={"game_id": game.game_id, "winner_id": 9999})
+    assert response.status_code == 400
+    assert "isn&#39;t playing in game" in response.get_data(as_text=True)
+
+
+def test_admin_results_rejects_malformed_bodies(log_in):
+    client = log_in(1)
+    with client.session_transaction() as session:
+        session["user_name"] = "tom"
+
+    for body in [[1, 2], {"results": [5]}, {"results": {"game_id": 1}}]:
+        response = client.post("/admin/results", json=body)
+        assert response.status_code == 400
+        assert not response.get_json()["success"]
+
+    assert client.post("/admin/results", data="not json").status_code == 400
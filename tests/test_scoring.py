@@ -0,0 +1,105 @@
+from sqlalchemy import event
+
+from app.extensions import scoring
+from app.extensions.db import db
+from app.extensions.encoding import store_user_bracket_bits
+from app.extensions.models import Game, User, UserPick, UserScore, get_all_user_picks
+from app.extensions.scoring import (
+    calculate_scores,
+    calculate_user_score,
+    get_scoreboard,
+    rebuild_user_scores,
+    refresh_user_scores,
+)
+from app.extensions.versions import RESULTS_VERSION, bump_versions, get_versions
+
+
+def count_queries(func):
+    """Run func, returning how many SQL statements it executed"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    return len(statements)
+
+
+def test_scoreboard_query_count_does_not_grow_with_users(add_users):
+    add_users(5)
+
+    # Warm the per-process caches (versions, topology, reachability index) so only the scoring's own queries count
+    rebuild_user_scores()
+    rebuild_queries = count_queries(rebuild_user_scores)
+    read_queries = count_queries(get_scoreboard)
+
+    add_users(45)
+
+    assert rebuild_user_scores() >= 50
+    assert count_queries(rebuild_user_scores) == rebuild_queries
+    assert count_queries(get_scoreboard) == read_queries == 1
+    assert rebuild_queries <= 6
+
+
+def test_reachability_index_is_rebuilt_when_results_change():
+    # A worker that scored before the bracket was seeded cached an empty index
+    scoring._reachability_index = (get_versions([RESULTS_VERSION])[0], ({}, {}))
+    bump_versions(RESULTS_VERSION)
+
+    feeds, team_bits = scoring.get_reachability_index(scoring.get_all_games())
+
+    assert len(feeds) == 63
+    assert len(team_bits) == 64
+
+
+def test_inconsistent_brackets_are_not_scored_bitwise(add_users):
+    consistent_id, inconsistent_id = add_users(2)
+    game = Game.query.filter_by(round=1).first()
+    child = Game.query.filter((Game.source_game_1 == game.game_id) | (Game.source_game_2 == game.game_id)).one()
+
+    # Picks team 1 to win the first game but team 2 to win the next
+    for game_id, team_id in [(game.game_id, game.team_1_id), (child.game_id, game.team_2_id)]:
+        UserPick.query.filter_by(user_id=inconsistent_id, game_id=game_id).update({"predicted_winner_id": team_id})
+    db.session.commit()
+
+    store_user_bracket_bits(consistent_id)
+    store_user_bracket_bits(inconsistent_id)
+    user = db.session.get(User, inconsistent_id)
+
+    assert db.session.get(User, consistent_id).bracket_mask is not None
+    assert user.bracket_mask is None
+
+    all_games = Game.query.all()
+    for result in all_games:
+        if result.game_id in (game.game_id, child.game_id):
+            result.winner_id = game.team_2_id
+    completed_games = {g.game_id: g for g in all_games if g.winner_id is not None}
+    picks = get_all_user_picks([inconsistent_id])[inconsistent_id]
+
+    scores = calculate_scores([user], {inconsistent_id: picks}, all_games)
+    current_points, _, _ = calculate_user_score(picks, completed_games)
+    db.session.rollback()
+
+    assert current_points > 0
+    assert scores[inconsistent_id]["current_points"] == current_points
+
+
+def test_storing_scores_keeps_win_probabilities_and_winning_paths(add_users):
+    (user_id,) = add_users(1)
+    score = db.session.get(UserScore, user_id)
+    score.win_probability = 0.25
+    score.winning_paths = 3
+    db.session.commit()
+
+    refresh_user_scores([user_id])
+    rebuild_user_scores()
+    db.session.expire_all()
+
+    score = db.session.get(UserScore, user_id)
+    assert (score.win_probability, score.winning_paths) == (0.25, 3)
+    assert score.max_points > 0
@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.extensions.models import Game, Team
+from app.extensions.simulation import build_simulation_inputs, calculate_win_probabilities, run_simulations
+
+from conftest import random_bracket
+
+
+@pytest.fixture
+def inputs():
+    """Simulation inputs for three users, the first two with the same bracket"""
+    games = Game.query.all()
+    seeds = {team.team_id: team.seed for team in Team.query.all()}
+    rng = random.Random(3)
+    brackets = [random_bracket(games, rng), random_bracket(games, rng)]
+    picks_by_user = {
+        user_id: {game_id: (team_id, seeds[team_id]) for game_id, team_id in bracket.items()}
+        for user_id, bracket in zip([1, 2, 3], [brackets[0], brackets[0], brackets[1]])
+    }
+
+    return build_simulation_inputs(games, seeds, [1, 2, 3], picks_by_user)
+
+
+def test_same_seed_gives_the_same_probabilities(add_users):
+    add_users(3)
+
+    first = calculate_win_probabilities(simulations=500, seed=7)
+
+    assert calculate_win_probabilities(simulations=500, seed=7) == first
+    assert calculate_win_probabilities(simulations=500, seed=8) != first
+
+
+def test_workers_match_a_single_process(inputs):
+    single = run_simulations(inputs, 1000, seed=7, workers=1, batch_size=100)
+
+    assert np.array_equal(run_simulations(inputs, 1000, seed=7, workers=2, batch_size=100), single)
+
+
+def test_probabilities_sum_to_one_with_ties_shared(inputs):
+    probabilities = run_simulations(inputs, 1000, seed=7, batch_size=300)
+
+    assert probabilities.sum() == pytest.approx(1)
+    assert probabilities[0] == probabilities[1]
+    assert probabilities[0] > 0
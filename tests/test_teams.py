@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from app.extensions.models import Game, Team, TeamAlias
+from app.extensions.ncaa_api import EST
+from app.extensions.teams import match_feed_game, resolve_team_id
+
+
+def feed_game(team_1_name, team_2_name, game_time):
+    return {"team_1_name": team_1_name, "team_2_name": team_2_name, "game_time": game_time}
+
+
+def first_round_game(team_name):
+    team = Team.query.filter_by(name=team_name).one()
+    return Game.query.filter(Game.round == 1, (Game.team_1_id == team.team_id) | (Game.team_2_id == team.team_id)).one()
+
+
+def test_misspelled_opponent_is_matched_without_storing_an_alias():
+    game = first_round_game("Kansas")
+    game_time = datetime.combine(game.game_time, datetime.min.time(), EST)
+    aliases = TeamAlias.query.count()
+
+    matched, team_ids = match_feed_game(feed_game("Cal Baptst", "Kansas", game_time))
+
+    assert matched["game_id"] == game.game_id
+    assert team_ids == [game.team_2_id, game.team_1_id]
+    assert resolve_team_id("Cal Baptst") is None
+    assert TeamAlias.query.count() == aliases
+
+
+def test_similar_names_outside_the_tournament_are_not_matched():
+    game = first_round_game("Kansas")
+    game_time = datetime.combine(game.game_time, datetime.min.time(), EST)
+
+    # Neither team is in the bracket
+    assert match_feed_game(feed_game("Kansas St.", "Florida St.", game_time)) == (None, [None, None])
+
+    # Duke's opponent isn't anything like Kansas St.
+    assert match_feed_game(feed_game("Kansas St.", "Duke", game_time))[0] is None
+
+    # Nor is Kansas playing that day
+    assert match_feed_game(feed_game("Cal Baptst", "Kansas", datetime(2024, 1, 1, tzinfo=EST)))[0] is None
+
+    assert resolve_team_id("Kansas St.") is None
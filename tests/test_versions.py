@@ -0,0 +1,69 @@
+from sqlalchemy import update
+
+from app.extensions.db import db
+from app.extensions.models import StateVersion
+from app.extensions.versions import bump_versions, get_versions, user_picks_version
+
+
+def bump_on_another_worker(name):
+    """Change a version in the database without this process's cache knowing"""
+    db.session.execute(update(StateVersion).where(StateVersion.name == name).values(version=StateVersion.version + 1))
+    db.session.commit()
+
+
+def test_uncached_versions_see_other_workers_changes(add_users):
+    (user_id,) = add_users(1)
+    name = user_picks_version(user_id)
+    bump_versions(name)
+    (version,) = get_versions([name])
+
+    bump_on_another_worker(name)
+
+    assert get_versions([name]) == [version]
+    assert get_versions([name], uncached=[name]) == [version + 1]
+
+
+def test_own_bracket_is_not_served_stale_after_saving_on_another_worker(add_users, log_in):
+    (user_id,) = add_users(1)
+    bump_versions(user_picks_version(user_id))
+
+    client = log_in(user_id)
+    etag = client.get("/bracket").headers["ETag"]
+
+    assert client.get("/bracket", headers={"If-None-Match": etag}).status_code == 304
+
+    bump_on_another_worker(user_picks_version(user_id))
+
+    assert client.get("/bracket", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_first_bump_creates_the_version(add_users):
+    (user_id,) = add_users(1)
+    name = user_picks_version(user_id)
+
+    bump_versions(name)
+    bump_versions(name)
+
+    assert db.session.get(StateVersion, name).version == 2
+
+
+def test_first_bump_racing_another_worker_still_bumps(add_users, monkeypatch):
+    from app.extensions import versions
+
+    (user_id,) = add_users(1)
+    name = user_picks_version(user_id)
+    bump_versions(name)
+
+    # The other worker inserted the row after this one's update found nothing to change
+    real_update = versions.update
+    calls = []
+
+    def update_missing_the_row(table):
+        calls.append(table)
+        statement = real_update(table)
+        return statement.where(StateVersion.name != name) if len(calls) == 1 else statement
+
+    monkeypatch.setattr(versions, "update", update_missing_the_row)
+    bump_versions(name)
+
+    assert db.session.get(StateVersion, name).version == 2